@@ -13,7 +13,7 @@ def load_library(libname, cdll=False):
             'lib',
             libname)
     else:
-        libfile = os.path.join(paths.module_path(), 'lib', libname)
+        libfile = os.path.join(paths.module_path_of(__file__), 'lib', libname)
     if cdll:
         return ctypes.cdll[libfile]
     else:
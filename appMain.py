@@ -6,8 +6,10 @@ import constants
 import globalVars
 import logging
 import glob
-from logging import getLogger, FileHandler, Formatter
+from logging import getLogger
 import os
+import logSystem
+import sound_lib.registry
 import sound_lib.sample
 import sound
 import buildSettings
@@ -29,19 +31,33 @@ class Application(window.SingletonWindow):
         super().initialize(1200, 800, buildSettings.GAME_NAME +
                            " (" + str(buildSettings.GAME_VERSION) + ")")
         self.initLogger()
+        sound.loadVolumes(buildSettings.GAME_NAME)
+        sound_lib.registry.registry.report_interval = constants.HANDLE_REPORT_INTERVAL
         self.sounds = {}
 
     def initLogger(self):
-        self.hLogHandler = FileHandler("debug.log", mode="w", encoding="UTF-8")
-        self.hLogHandler.setLevel(logging.DEBUG)
-        self.hLogFormatter = Formatter(
-            "%(name)s - %(levelname)s - %(message)s")
-        self.hLogHandler.setFormatter(self.hLogFormatter)
+        self.logPipeline = logSystem.LogPipeline(
+            filename=constants.LOG_FILE_NAME,
+            maxBytes=constants.LOG_MAX_BYTES,
+            backupCount=constants.LOG_BACKUP_COUNT,
+            ringBufferSize=constants.LOG_RING_BUFFER_SIZE,
+            frameBudget=constants.LOG_FRAME_BUDGET)
         self.log = getLogger("app")
         self.log.setLevel(logging.DEBUG)
-        self.log.addHandler(self.hLogHandler)
+        self.logPipeline.start(self.log)
         self.log.info("Starting.")
 
+    def frameUpdate(self):
+        self.logPipeline.newFrame()
+        super().frameUpdate()
+        sound_lib.registry.registry.update(self.log)
+
+    def dumpCrashLog(self):
+        """Writes the recently logged records to the crash dump file. Called from boot.py when the game terminates with an unhandled exception."""
+        self.log.exception("Unhandled exception.")
+        self.logPipeline.dumpRecent(constants.LOG_CRASH_DUMP_FILE_NAME)
+        self.logPipeline.stop()
+
     def run(self):
         self.playOneShot("fx/decide.ogg")
         while(True):
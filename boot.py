@@ -3,17 +3,54 @@
 # Bootstrap
 # Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
 
+import argparse
+import os
 import sys
 
 import appMain
 import globalVars
 
 
+def parseArgs():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--record", metavar="FILE", help="record input to FILE")
+    parser.add_argument(
+        "--replay", metavar="FILE", help="replay input recorded in FILE")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="don't limit the frame rate while replaying")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without a visible window")
+    parser.add_argument(
+        "--telemetry", metavar="FILE", help="enable telemetry and export to FILE")
+    return parser.parse_args()
+
+
 def main():
+    args = parseArgs()
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
     app = appMain.Application()
     app.initialize()
     globalVars.app = app
-    app.run()
+    if args.telemetry:
+        app.telemetry.fileName = args.telemetry
+        app.telemetry.setEnabled(True)
+    if args.record:
+        app.startRecording(args.record)
+    if args.replay:
+        app.startReplay(args.replay, realtime=not args.fast)
+    try:
+        app.run()
+    except Exception:
+        app.dumpCrashLog()
+        raise
+    finally:
+        app.stopRecording()
 
 
 #global schope
@@ -2,3 +2,26 @@
 # Python audio game template
 # constant values
 # Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+
+# logging
+LOG_FILE_NAME = "debug.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_RING_BUFFER_SIZE = 500
+LOG_FRAME_BUDGET = 50  # 0 for unlimited
+LOG_CRASH_DUMP_FILE_NAME = "crash.log"
+
+# frame telemetry (toggle with alt+f12 while running)
+TELEMETRY_ENABLED = False
+TELEMETRY_FILE_NAME = "telemetry.log"
+TELEMETRY_EXPORT_INTERVAL = 5.0  # seconds
+
+# live BASS object report, logged every this many seconds (0 to disable; see sound_lib/registry.py)
+HANDLE_REPORT_INTERVAL = 0
+
+# volume categories, saved in the user's app data folder (see sound.loadVolumes)
+VOLUME_FILE_NAME = "volume.json"
+
+# music ducking under speech (see sound.duckFor)
+SPEECH_CHARACTERS_PER_SECOND = 15.0  # used to estimate how long speech lasts
+MUSIC_DUCK_DEPTH = -12.0  # dB
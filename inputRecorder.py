@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Input recording and deterministic replay
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# File format (little endian):
+# header: magic "AGIR", uint16 version, uint16 number of keys
+# frame: uint32 ticks, uint8 flags, followed by the key bitset (ceil(keys / 8) bytes) only when FLAG_KEYS_CHANGED is set.
+
+import struct
+
+MAGIC = b"AGIR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+FRAME = struct.Struct("<IB")
+FLAG_KEYS_CHANGED = 1
+FLAG_QUIT = 2
+
+
+class InputRecordError(Exception):
+    """Raised when an input record file is broken or has an unsupported version."""
+
+
+def _pack(keys):
+    bits = bytearray((len(keys) + 7) // 8)
+    for i, k in enumerate(keys):
+        if k:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def _unpack(bits, count):
+    return tuple(bool(bits[i >> 3] & (1 << (i & 7))) for i in range(count))
+
+
+class InputRecorder:
+    """Records the key state, tick count and quit requests of every frame. Data is kept in memory and written when close is called."""
+
+    def __init__(self, fileName):
+        """
+        :param fileName: File to write.
+        :type fileName: str
+        """
+        self.fileName = fileName
+        self.data = bytearray()
+        self.keyCount = None
+        self.previousBits = None
+        self.frames = 0
+
+    def record(self, ticks, keys, quit=False):
+        """
+        Records one frame.
+
+        :param ticks: pygame tick count of this frame.
+        :type ticks: int
+        :param keys: Key state returned by pygame.key.get_pressed.
+        :type keys: sequence
+        :param quit: Whether a quit event was received at this frame.
+        :type quit: bool
+        """
+        if self.keyCount is None:
+            self.keyCount = len(keys)
+            self.data += HEADER.pack(MAGIC, VERSION, self.keyCount)
+        bits = _pack(keys)
+        flags = FLAG_QUIT if quit else 0
+        if bits != self.previousBits:
+            flags |= FLAG_KEYS_CHANGED
+        self.data += FRAME.pack(ticks & 0xffffffff, flags)
+        if flags & FLAG_KEYS_CHANGED:
+            self.data += bits
+            self.previousBits = bits
+        self.frames += 1
+
+    def close(self):
+        """Writes the recorded frames to the file."""
+        if self.keyCount is None:
+            self.data += HEADER.pack(MAGIC, VERSION, 0)
+        with open(self.fileName, "wb") as f:
+            f.write(self.data)
+
+
+class InputReplayer:
+    """Reads a file written by InputRecorder and returns its frames one by one."""
+
+    def __init__(self, fileName):
+        """
+        :param fileName: File to read.
+        :type fileName: str
+        """
+        self.fileName = fileName
+        with open(fileName, "rb") as f:
+            self.data = f.read()
+        if len(self.data) < HEADER.size:
+            raise InputRecordError("%s is too short" % fileName)
+        magic, version, self.keyCount = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise InputRecordError("%s is not an input record" % fileName)
+        if version != VERSION:
+            raise InputRecordError(
+                "unsupported input record version %d" % version)
+        self.bitsSize = (self.keyCount + 7) // 8
+        self.offset = HEADER.size
+        self.keys = (False,) * self.keyCount
+        self.ticks = 0
+        self.quit = False
+        self.frames = 0
+
+    @property
+    def finished(self):
+        """
+        Retrieves if all frames have been replayed.
+
+        :rtype: bool
+        """
+        return self.offset + FRAME.size > len(self.data)
+
+    def next(self):
+        """
+        Advances to the next frame. Returns False when there's no frame left. After this call, keys, ticks and quit hold the state of the frame.
+
+        :rtype: bool
+        """
+        if self.finished:
+            return False
+        self.ticks, flags = FRAME.unpack_from(self.data, self.offset)
+        self.offset += FRAME.size
+        if flags & FLAG_KEYS_CHANGED:
+            bits = self.data[self.offset:self.offset + self.bitsSize]
+            if len(bits) < self.bitsSize:
+                raise InputRecordError("input record is truncated")
+            self.offset += self.bitsSize
+            self.keys = _unpack(bits, self.keyCount)
+        self.quit = bool(flags & FLAG_QUIT)
+        self.frames += 1
+        return True
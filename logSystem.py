@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Asynchronous logging pipeline
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+
+import atexit
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent log records in memory so that they can be dumped when the game crashes. Storing a record is a single deque append; formatting is deferred until dump is called."""
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, filename):
+        """
+        Writes all buffered records to the specified file.
+
+        :param filename: File to write.
+        :type filename: str
+        """
+        with open(filename, "w", encoding="UTF-8") as f:
+            for elem in list(self.records):
+                f.write(self.format(elem) + "\n")
+        # end with
+    # end dump
+
+
+class FrameBudgetFilter(logging.Filter):
+    """Limits the number of records that are passed to the file per frame. Records at WARNING level or above are always passed. Call newFrame once per frame to reset the budget."""
+
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+        self.used = 0
+        self.dropped = 0
+        self.totalDropped = 0
+
+    def filter(self, record):
+        if self.budget <= 0 or record.levelno >= logging.WARNING:
+            return True
+        if self.used >= self.budget:
+            self.dropped += 1
+            return False
+        self.used += 1
+        return True
+
+    def newFrame(self):
+        """Resets the budget and returns the number of records dropped at the last frame."""
+        dropped = self.dropped
+        self.totalDropped += dropped
+        self.used = 0
+        self.dropped = 0
+        return dropped
+
+
+class LogPipeline:
+    """
+    Non-blocking logging setup. The game thread only puts records on a queue; a listener thread formats them and writes them to a size-rotated file.
+
+    Instantiate this class, call start method with a logger, then call newFrame method once per frame.
+    """
+
+    def __init__(
+            self,
+            filename="debug.log",
+            maxBytes=1024 * 1024,
+            backupCount=3,
+            ringBufferSize=500,
+            frameBudget=0,
+            formatter=None):
+        """
+        :param filename: Log file name.
+        :type filename: str
+        :param maxBytes: Size at which the log file is rotated. 0 disables rotation.
+        :type maxBytes: int
+        :param backupCount: Number of rotated files to keep.
+        :type backupCount: int
+        :param ringBufferSize: Number of recent records kept in memory for crash dumps.
+        :type ringBufferSize: int
+        :param frameBudget: Maximum number of records below WARNING written per frame. 0 means unlimited.
+        :type frameBudget: int
+        :param formatter: Formatter used for the file and crash dumps.
+        :type formatter: logging.Formatter
+        """
+        if formatter is None:
+            formatter = logging.Formatter(
+                "%(name)s - %(levelname)s - %(message)s")
+        self.formatter = formatter
+        self.fileHandler = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount, encoding="UTF-8", delay=True)
+        if maxBytes > 0 and os.path.isfile(
+                filename) and os.path.getsize(filename) > 0:
+            self.fileHandler.doRollover()  # Each run starts with a fresh file
+        self.fileHandler.setLevel(logging.DEBUG)
+        self.fileHandler.setFormatter(formatter)
+        self.queue = queue.SimpleQueue()
+        self.queueHandler = logging.handlers.QueueHandler(self.queue)
+        self.budgetFilter = FrameBudgetFilter(frameBudget)
+        self.queueHandler.addFilter(self.budgetFilter)
+        self.ringBuffer = RingBufferHandler(ringBufferSize)
+        self.ringBuffer.setFormatter(formatter)
+        self.listener = logging.handlers.QueueListener(
+            self.queue, self.fileHandler, respect_handler_level=True)
+        self.logger = None
+        self.running = False
+
+    def start(self, logger):
+        """
+        Attaches this pipeline to the given logger and starts the listener thread.
+
+        :param logger: Logger to attach.
+        :type logger: logging.Logger
+        """
+        self.logger = logger
+        logger.addHandler(self.ringBuffer)
+        logger.addHandler(self.queueHandler)
+        self.listener.start()
+        self.running = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flushes all pending records and stops the listener thread. It is safe to call this method multiple times."""
+        if not self.running:
+            return
+        self.running = False
+        self.listener.stop()
+        self.fileHandler.close()
+        if self.logger is not None:
+            self.logger.removeHandler(self.queueHandler)
+
+    def newFrame(self):
+        """Must be called once per frame. Resets the per-frame budget and reports how many records were dropped."""
+        dropped = self.budgetFilter.newFrame()
+        if dropped > 0 and self.logger is not None:
+            self.logger.warning(
+                "%d log records dropped by the per-frame budget" %
+                dropped)
+
+    def dumpRecent(self, filename):
+        """
+        Writes the in-memory ring buffer to the specified file. Intended to be called from a crash handler.
+
+        :param filename: File to write.
+        :type filename: str
+        """
+        self.ringBuffer.dump(filename)
@@ -1,10 +1,14 @@
-import inspect
+import functools
 import platform
 import os
 import subprocess
 import sys
 import string
 import unicodedata
+try:
+    from _imp import is_frozen as _is_frozen_module
+except ImportError:
+    from imp import is_frozen as _is_frozen_module
 
 plat = platform.system()
 is_windows = plat == 'Windows'
@@ -46,6 +50,7 @@ def prepare_app_data_path(app_name):
     return ensure_path(dir)
 
 
+@functools.lru_cache(maxsize=None)
 def embedded_data_path():
     if is_mac and is_frozen():
         return os.path.abspath(
@@ -56,12 +61,13 @@ def embedded_data_path():
     return app_path()
 
 
+@functools.lru_cache(maxsize=None)
 def is_frozen():
     """Return a bool indicating if application is compressed"""
-    import imp
-    return hasattr(sys, 'frozen') or imp.is_frozen("__main__")
+    return hasattr(sys, 'frozen') or _is_frozen_module("__main__")
 
 
+@functools.lru_cache(maxsize=None)
 def get_executable():
     """Returns the full executable path/name if frozen, or the full path/name of the main module if not."""
     if is_frozen():
@@ -83,10 +89,11 @@ def get_executable():
 
 
 def get_module(level=2):
-    """Hacky method for deriving the caller of this function's module."""
-    return inspect.getmodule(inspect.stack()[level][0]).__file__
+    """Hacky method for deriving the caller of this function's module. Only looks up the requested frame; prefer module_path_of when the module is known."""
+    return sys._getframe(level).f_globals['__file__']
 
 
+@functools.lru_cache(maxsize=None)
 def executable_directory():
     """Always determine the directory of the executable, even when run with py2exe or otherwise frozen"""
     executable = get_executable()
@@ -94,6 +101,7 @@ def executable_directory():
     return path
 
 
+@functools.lru_cache(maxsize=None)
 def app_path():
     """Return the root of the application's directory"""
     path = executable_directory()
@@ -103,7 +111,17 @@ def app_path():
 
 
 def module_path(level=2):
-    return os.path.abspath(os.path.dirname(get_module(level)))
+    return module_path_of(get_module(level))
+
+
+@functools.lru_cache(maxsize=None)
+def module_path_of(module):
+    """Returns the directory of the given module without inspecting the stack. Accepts a module object, a module's __file__ or a module name."""
+    if isinstance(module, str) and module in sys.modules:
+        module = sys.modules[module]
+    if not isinstance(module, str):
+        module = module.__file__
+    return os.path.abspath(os.path.dirname(module))
 
 
 def documents_path():
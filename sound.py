@@ -5,11 +5,69 @@
 # License: GPL V2.0 (See copying.txt for details)
 
 import math
+import os
+from logging import getLogger
+import constants
 import sound_lib
+import sound_lib.ducking
+import sound_lib.mixer
 import sound_lib.output
 import sound_lib.sample
+import sound_lib.volume
 from sound_lib import stream
+from sound_lib.external.pybass import BASS_CONFIG_GVOL_SAMPLE
 o = sound_lib.output.Output()
+# Streams play through one master mixer with a decoding bus each for music,
+# ui and voice; add decoding channels to a bus with bus.add_channel.
+# One-shots are samples, so sfx maps onto BASS's global sample volume
+# instead.
+master = sound_lib.mixer.Mixer(float=True)
+master.play()
+
+
+def _createBus():
+    bus = sound_lib.mixer.Mixer(float=True, decode=True)
+    master.add_channel(bus, buffer=True)
+    return bus
+
+
+musicBus = _createBus()
+uiBus = _createBus()
+voiceBus = _createBus()
+# Volume categories (master, music, sfx, ui, voice).
+volumes = sound_lib.volume.VolumeCategories()
+volumes.bind_config("sfx", BASS_CONFIG_GVOL_SAMPLE)
+volumes.bind_bus("music", musicBus)
+volumes.bind_bus("ui", uiBus)
+volumes.bind_bus("voice", voiceBus)
+# Music is ducked under UI sounds and speech (see duckFor).
+ducker = sound_lib.ducking.DuckingController(master)
+ducker.add_target(musicBus, constants.MUSIC_DUCK_DEPTH)
+
+
+def getMusicBus():
+    """Returns the bus to play music through, e.g. with sound_lib.adaptive.MusicEngine or sound_lib.playlist.QueuePlayer. The music volume category controls it."""
+    return musicBus
+
+
+def loadVolumes(appName):
+    """Loads the volume levels saved in the user's app data folder and saves changes made with setVolume there."""
+    from platform_utils import paths
+    volumes.filename = os.path.join(
+        paths.prepare_app_data_path(appName),
+        constants.VOLUME_FILE_NAME)
+    volumes.load()
+
+
+def setVolume(category, level):
+    """Sets the volume of a category from 0 to 1 and saves it if loadVolumes was called. This changes a BASS global volume or bus, not every playing sound. A failure to save is logged; the new level stays in effect."""
+    volumes.set(category, level)
+    if volumes.filename:
+        try:
+            volumes.save()
+        except IOError:
+            getLogger("app").warning(
+                "Could not save volume levels to %s." % volumes.filename, exc_info=True)
 
 
 class sound():
@@ -114,6 +172,7 @@ class sound():
     def close(self):
         if self.handle:
             self.handle.free()
+            self.handle = None
 
 
 class oneShotInstance(object):
@@ -122,6 +181,7 @@ class oneShotInstance(object):
         self.channel = None
 
     def play(self, path, pan, vol, pitch):
+        self.release()
         self.sample = sound_lib.sample.Sample(path)
         self.channel = sound()
         self.channel.load(self.sample)
@@ -132,30 +192,78 @@ class oneShotInstance(object):
         return self.channel
 
     def getPlayState(self):
-        return self.channel.playing
+        return self.channel is not None and self.channel.playing
+
+    def release(self):
+        """Frees the sample. Call it once the sound has finished playing."""
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+        if self.sample is not None:
+            self.sample.free()
+            self.sample = None
 
 # helper functions
 
 
-def playOneShot(sample, pan=0, vol=0, pitch=100):
+def playOneShot(sample, pan=0, vol=0, pitch=100, duck=False):
+    """Plays a Sample or a file once. With duck, music is ducked while it plays (see ducker)."""
     if isinstance(sample, str):
-        return _playOneShotFile(sample, pan, vol, pitch)
-    # end file
-    s = sound()
-    s.load(sample)
-    s.pan = pan
-    s.volume = vol
-    s.pitch = pitch
-    s.play()
+        s = _playOneShotFile(sample, pan, vol, pitch)
+    else:
+        s = sound()
+        s.load(sample)
+        s.pan = pan
+        s.volume = vol
+        s.pitch = pitch
+        s.play()
+    # end file or sample
+    if duck and s is not None:
+        duckFor(s.handle.length_in_seconds())
     return s
 
 
 # end playOneShot
+
+
+def duckFor(seconds):
+    """Ducks the music bus for seconds. Menu sounds and speech from window.SingletonWindow.say call this. Set ducker to None to turn ducking off."""
+    if ducker is not None:
+        ducker.trigger(seconds)
+
+
+def unduck():
+    if ducker is not None:
+        ducker.release_now()
+
+
+variantCache = None
+
+
+def playVariant(path, pan=0, vol=0, pitch=100):
+    """Plays a random pitch/tempo variant of a one-shot file. Variants are rendered once and kept in memory; see sound_lib.variants."""
+    global variantCache
+    if variantCache is None:
+        import sound_lib.variants
+        variantCache = sound_lib.variants.VariantCache()
+    # end create cache
+    return playOneShot(variantCache.pick(path), pan, vol, pitch)
+
+
 oneshots = [None] * 100
 
 
+def releaseFinishedOneShots():
+    """Frees the samples of one-shot files that have finished playing, so they don't stay in memory until their slot is reused."""
+    for s in oneshots:
+        if s is not None and s.sample is not None and not s.getPlayState():
+            s.release()
+    # end for
+
+
 def _playOneShotFile(path, pan, vol, pitch):
     global oneshots
+    releaseFinishedOneShots()
     i = 0
     found = -1
     for i in range(100):
@@ -0,0 +1,246 @@
+from __future__ import absolute_import
+import math
+import threading
+from .external.pybass import *
+from .mixer import Mixer
+from .stream import FileStream
+
+
+class Cue(object):
+    """A piece of music made of stems: files of the same length that play in lockstep, e.g. drums, bass and pads.
+
+    bpm and beats_per_bar define the bar grid that transitions are aligned to. Stem i is heard when the engine's intensity is at least thresholds[i]; by default the first stem is always on and the others come in evenly up to intensity 1. next lists the names of cues likely to follow, which are prefetched while this one plays."""
+
+    def __init__(
+            self,
+            name,
+            stems,
+            bpm=120.0,
+            beats_per_bar=4,
+            thresholds=None,
+            loop=True,
+            next=()):
+        self.name = name
+        self.stems = list(stems)
+        self.bpm = bpm
+        self.beats_per_bar = beats_per_bar
+        if thresholds is None:
+            thresholds = [i / float(len(self.stems)) for i in range(len(self.stems))]
+        self.thresholds = list(thresholds)
+        self.loop = loop
+        self.next = tuple(next)
+
+    @property
+    def beat_length(self):
+        return 60.0 / self.bpm
+
+    @property
+    def bar_length(self):
+        return self.beat_length * self.beats_per_bar
+
+
+class _PlayingCue(object):
+
+    def __init__(self, cue, streams, start_frame):
+        self.cue = cue
+        self.streams = streams
+        self.start_frame = start_frame
+        self.levels = [0.0] * len(streams)
+
+
+class MusicEngine(object):
+    """Plays Cues through one mixer so that their stems share a clock.
+
+    Stems fade in and out with mixer envelopes as set_intensity() changes, and play() switches cues on the next bar (or beat) of the current one: the new cue's stems are added with a mixer start delay landing exactly on the boundary, while the old ones fade out from it. Stem files are read into memory and their decoders opened ahead of time by prefetch(), so a transition never waits for the disk; if that fails, the error is kept in errors and raised by the next play() of the cue. Call update() regularly, e.g. every frame, to release finished cues."""
+
+    def __init__(self, mixer=None, fade_time=2.0, transition_fade=0.05, lead=0.1):
+        if mixer is None:
+            mixer = Mixer(float=True)
+            mixer.play()
+        self.mixer = mixer
+        self.fade_time = fade_time
+        self.transition_fade = transition_fade
+        self.lead = lead
+        self.cues = {}
+        self.data = {}
+        self.prepared = {}
+        self.loaders = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+        self.current = None
+        self.retiring = []
+        self.intensity = 0.0
+
+    def add_cue(self, cue):
+        self.cues[cue.name] = cue
+        return cue
+
+    def frames(self, seconds):
+        return int(round(seconds * self.mixer.freq))
+
+    def _open(self, cue):
+        streams = []
+        try:
+            for filename in cue.stems:
+                data = self.data.get(filename)
+                if data is None:
+                    with open(filename, 'rb') as f:
+                        data = f.read()
+                    self.data[filename] = data
+                streams.append(FileStream(
+                    mem=True,
+                    file=data,
+                    length=len(data),
+                    flags=BASS_SAMPLE_FLOAT | (BASS_SAMPLE_LOOP if cue.loop else 0),
+                    decode=True,
+                    unicode=False))
+            # end for
+        except Exception:
+            for s in streams:
+                s.free()
+            raise
+        return streams
+
+    def _load(self, name):
+        streams = None
+        try:
+            streams = self._open(self.cues[name])
+        except Exception as e:
+            with self.lock:
+                self.errors[name] = e
+        finally:
+            with self.lock:
+                if streams is not None:
+                    self.prepared[name] = streams
+                self.loaders.pop(name, None)
+
+    def prefetch(self, name):
+        """Reads a cue's stems and opens their decoders on a background thread."""
+        with self.lock:
+            if name in self.prepared or name in self.loaders:
+                return
+            self.errors.pop(name, None)
+            loader = threading.Thread(target=self._load, args=(name,))
+            loader.daemon = True
+            self.loaders[name] = loader
+        loader.start()
+
+    def _take(self, name):
+        with self.lock:
+            loader = self.loaders.get(name)
+        if loader is not None:
+            loader.join()
+        with self.lock:
+            streams = self.prepared.pop(name, None)
+            error = self.errors.pop(name, None)
+        if error is not None:
+            raise error
+        if streams is None:
+            streams = self._open(self.cues[name])
+        return streams
+
+    def unload(self, name):
+        """Forgets a cue's file data and prepared decoders."""
+        with self.lock:
+            streams = self.prepared.pop(name, [])
+        for s in streams:
+            s.free()
+        for filename in self.cues[name].stems:
+            self.data.pop(filename, None)
+
+    def _stem_level(self, playing, index):
+        return 1.0 if self.intensity >= playing.cue.thresholds[index] else 0.0
+
+    def next_boundary(self, unit='bar'):
+        """Returns the mixer frame of the current cue's next bar or beat that the mixer hasn't processed yet (lead seconds of margin included)."""
+        earliest = self.mixer.get_mix_frame() + self.frames(self.lead)
+        if self.current is None:
+            return earliest
+        cue = self.current.cue
+        length = self.frames(cue.bar_length if unit == 'bar' else cue.beat_length)
+        elapsed = max(0, earliest - self.current.start_frame)
+        return self.current.start_frame + int(math.ceil(elapsed / float(length))) * length
+
+    def play(self, name, at='bar', fade=None):
+        """Switches to cue name on the next 'bar' or 'beat' of the current cue, or 'now'. The old cue fades out over fade seconds (transition_fade by default) from that point while the new one starts."""
+        streams = self._take(name)
+        playing = _PlayingCue(self.cues[name], streams, 0)
+        fade_frames = self.frames(self.transition_fade if fade is None else fade)
+        self.mixer.lock()
+        try:
+            if at == 'now' or self.current is None:
+                boundary = self.mixer.get_mix_frame() + self.frames(self.lead)
+            else:
+                boundary = self.next_boundary(at)
+            delay = boundary - self.mixer.get_mix_frame()
+            playing.start_frame = boundary
+            for i, stream in enumerate(streams):
+                level = self._stem_level(playing, i)
+                playing.levels[i] = level
+                self.mixer.add_channel(stream, delay=delay, norampin=True)
+                # Envelope frames count from the stem's start.
+                self.mixer.set_envelope(stream, [(0, level)])
+            # end for
+            if self.current is not None:
+                self._retire(self.current, delay, fade_frames)
+            self.current = playing
+        finally:
+            self.mixer.unlock()
+        for following in playing.cue.next:
+            self.prefetch(following)
+        return boundary
+
+    def _retire(self, playing, delay, fade_frames):
+        for stream in playing.streams:
+            # Hold what is heard now, not the target level, in case a set_intensity() fade is in progress.
+            self.mixer.ramp(stream, 0.0, fade_frames, delay=delay)
+        # end for
+        self.retiring.append((self.mixer.get_mix_frame() + delay + fade_frames, playing))
+
+    def stop(self, fade=None):
+        """Fades the current cue out now."""
+        if self.current is None:
+            return
+        fade_frames = self.frames(self.fade_time if fade is None else fade)
+        self.mixer.lock()
+        try:
+            self._retire(self.current, 0, fade_frames)
+        finally:
+            self.mixer.unlock()
+        self.current = None
+
+    def set_intensity(self, intensity, fade=None):
+        """Sets the intensity (0 to 1) and fades stems in or out over fade seconds (fade_time by default)."""
+        self.intensity = intensity
+        if self.current is None:
+            return
+        fade_frames = self.frames(self.fade_time if fade is None else fade)
+        playing = self.current
+        for i, stream in enumerate(playing.streams):
+            level = self._stem_level(playing, i)
+            if level != playing.levels[i]:
+                self.mixer.ramp(stream, level, fade_frames)
+                playing.levels[i] = level
+        # end for
+
+    def update(self):
+        """Frees cues that have faded out."""
+        now = self.mixer.get_mix_frame()
+        done = [r for r in self.retiring if r[0] <= now]
+        for item in done:
+            self.retiring.remove(item)
+            for stream in item[1].streams:
+                self.mixer.remove_channel(stream)
+                stream.free()
+            # end for
+        # end for
+
+    def get_position(self):
+        """Returns (bar, beat) of the current cue at the mixer's processing position, counting from 0."""
+        if self.current is None:
+            return None
+        cue = self.current.cue
+        beats = (self.mixer.get_mix_frame() - self.current.start_frame) / (
+            cue.beat_length * self.mixer.freq)
+        beats = max(0.0, beats)
+        return int(beats // cue.beats_per_bar), beats % cue.beats_per_bar
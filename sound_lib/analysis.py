@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+from ctypes import pointer
+import numpy
+from .external.pybass import *
+from .main import bass_call, bass_call_0, bass_call_dword, address_of, BassError
+
+FFT_FLAGS = {
+    256: BASS_DATA_FFT256,
+    512: BASS_DATA_FFT512,
+    1024: BASS_DATA_FFT1024,
+    2048: BASS_DATA_FFT2048,
+    4096: BASS_DATA_FFT4096,
+    8192: BASS_DATA_FFT8192,
+}
+
+# Octave-ish bands for gameplay use (noise meters, stealth).
+DEFAULT_BANDS = (20, 150, 400, 1000, 2500, 6000, 20000)
+
+
+def unpack_level(level):
+    """Splits the DWORD returned by Channel.get_level into (left, right) peaks from 0 to 1."""
+    return (level & 0xffff) / 32768.0, ((level >> 16) & 0xffff) / 32768.0
+
+
+def to_decibels(values, floor=-96.0):
+    """Converts linear amplitudes to dBFS, clamped at floor."""
+    with numpy.errstate(divide='ignore'):
+        return numpy.maximum(20 * numpy.log10(values), floor)
+
+
+class Analyzer(object):
+    """Spectrum and level analysis of a playing channel or bus.
+
+    BASS computes the FFT and returns the latest data from the channel's playback buffer, so nothing is decoded twice and playback is not affected. Do not use an Analyzer on a decoding channel: reading its data would consume it.
+
+    Results are written to buffers allocated once and returned directly, so they are overwritten by the next call; copy them to keep them, or pass out= arrays. With smoothing (0 to 1), each result is an exponential moving average: the fraction of the previous value kept on every call."""
+
+    def __init__(self, channel, fft_size=1024, smoothing=0.0, bands=DEFAULT_BANDS, window=0.05):
+        if fft_size not in FFT_FLAGS:
+            raise ValueError('fft_size must be one of %s' % sorted(FFT_FLAGS))
+        self.handle = channel.handle if hasattr(channel, 'handle') else channel
+        info = BASS_CHANNELINFO()
+        bass_call(BASS_ChannelGetInfo, self.handle, pointer(info))
+        self.sample_rate = info.freq
+        self.chans = info.chans
+        self.fft_size = fft_size
+        self.fft_flag = FFT_FLAGS[fft_size] & 0xffffffff
+        self.smoothing = smoothing
+        self.raw_spectrum = numpy.zeros(fft_size // 2, dtype=numpy.float32)
+        self.spectrum_buffer = numpy.zeros(fft_size // 2, dtype=numpy.float32)
+        self.frequencies = numpy.arange(fft_size // 2) * (
+            float(self.sample_rate) / fft_size)
+        self.samples = numpy.zeros(
+            (max(1, int(window * self.sample_rate)), self.chans),
+            dtype=numpy.float32)
+        self.rms_buffer = numpy.zeros(self.chans, dtype=numpy.float32)
+        self.peak_buffer = numpy.zeros(self.chans, dtype=numpy.float32)
+        self.set_bands(bands)
+
+    def set_bands(self, edges):
+        """Sets the band edges in Hz used by band_energies(). Band i covers the bins from edges[i] up to, not including, edges[i + 1]."""
+        bins = numpy.searchsorted(self.frequencies, edges)
+        self.band_edges = tuple(edges)
+        self.band_starts = bins[:-1]
+        self.band_ends = bins[1:]
+        self.cumulative = numpy.zeros(len(self.frequencies) + 1)
+        self.band_buffer = numpy.zeros(len(edges) - 1, dtype=numpy.float32)
+
+    def _smooth(self, current, new):
+        if self.smoothing:
+            current *= self.smoothing
+            current += new * (1.0 - self.smoothing)
+        else:
+            current[:] = new
+
+    def spectrum(self, out=None):
+        """Returns FFT magnitudes (linear, fft_size / 2 bins, channels combined). Bin i is at frequencies[i] Hz."""
+        bass_call_0(
+            BASS_ChannelGetData,
+            self.handle,
+            address_of(self.raw_spectrum),
+            self.fft_flag)
+        self._smooth(self.spectrum_buffer, self.raw_spectrum)
+        if out is not None:
+            out[:] = self.spectrum_buffer
+            return out
+        return self.spectrum_buffer
+
+    def band_energies(self, out=None):
+        """Returns the energy (sum of squared magnitudes) of each band set with set_bands()."""
+        power = self.spectrum() ** 2
+        # Band sums as differences of a running total, so empty bands come out as 0.
+        numpy.cumsum(power, out=self.cumulative[1:])
+        numpy.subtract(
+            self.cumulative[self.band_ends],
+            self.cumulative[self.band_starts],
+            out=self.band_buffer,
+            casting='unsafe')
+        if out is not None:
+            out[:] = self.band_buffer
+            return out
+        return self.band_buffer
+
+    def _read_samples(self):
+        try:
+            got = bass_call_dword(
+                BASS_ChannelGetData,
+                self.handle,
+                address_of(self.samples),
+                self.samples.nbytes | BASS_DATA_FLOAT)
+        except BassError:  # e.g. the channel has ended
+            got = 0
+        return self.samples[:got // (4 * self.chans)]
+
+    def levels(self):
+        """Returns (rms, peak) arrays with one linear value per channel over the last window seconds."""
+        data = self._read_samples()
+        if len(data):
+            rms = numpy.sqrt(numpy.mean(numpy.square(data), axis=0))
+            peak = numpy.abs(data).max(axis=0)
+        else:
+            rms = peak = 0.0
+        self._smooth(self.rms_buffer, rms)
+        self._smooth(self.peak_buffer, peak)
+        return self.rms_buffer, self.peak_buffer
+
+    def loudness(self):
+        """Returns the RMS level of all channels combined in dBFS, a convenient single number for noise meters and ducking decisions."""
+        rms = self.levels()[0]
+        return float(to_decibels(numpy.sqrt(numpy.mean(numpy.square(rms)))))
@@ -1,7 +1,15 @@
 from __future__ import absolute_import
 from .external.pybass import *
-from .main import bass_call, bass_call_0, BassError, update_3d_system, FlagObject
+from .main import bass_call, bass_call_0, bass_call_dword, BassError, update_3d_system, FlagObject, address_of, buffer_size
+from .registry import registry
 from ctypes import pointer, c_float, c_long, c_ulong, c_buffer
+from inspect import isclass
+
+
+def _buffer_format(buffer):
+    if hasattr(buffer, 'dtype'):
+        return buffer.dtype.char
+    return memoryview(buffer).format.lstrip('<=@')
 
 
 class Channel (FlagObject):
@@ -9,6 +17,9 @@ class Channel (FlagObject):
 
     def __init__(self, handle):
         self.handle = handle
+        registry.register(self)
+        self.dsps = []
+        self.syncs = {}
         self.attribute_mapping = {
             'eaxmix': BASS_ATTRIB_EAXMIX,
             'frequency': BASS_ATTRIB_FREQ,
@@ -94,8 +105,52 @@ class Channel (FlagObject):
     device = property(get_device, set_device)
 
     def set_fx(self, type, priority=0):
-        """Sets an effect on a stream, MOD music, or recording channel."""
-        return SoundEffect(bass_call(BASS_ChannelSetFX, type, priority))
+        """Sets an effect on a stream, MOD music, or recording channel. type is a BASS_FX_* constant or a SoundEffect subclass; a SoundEffect is returned."""
+        from .effects.effect import SoundEffect
+        if isclass(type):
+            return type(self, priority=priority)
+        return SoundEffect(self, type, priority)
+
+    def add_dsp(self, dsp, priority=0):
+        """Sets a Python DSP (a sound_lib.dsp.DSP or a function taking a float32 NumPy array of shape (frames, channels)) on this channel. DSPs with higher priority run first. Returns the DSP."""
+        from .dsp import DSP, FunctionDSP
+        if not isinstance(dsp, DSP):
+            dsp = FunctionDSP(dsp)
+        dsp.attach(self, priority)
+        self.dsps.append(dsp)
+        return dsp
+
+    def remove_dsp(self, dsp):
+        dsp.detach()
+        self.dsps.remove(dsp)
+
+    def set_sync(self, type, param, func, onetime=False, mixtime=False):
+        """Sets up a synchronizer: func(sync, channel, data) is called when the event type (a BASS_SYNC_* value) occurs. Returns the sync handle.
+
+        With mixtime, func is called on the mixing thread when the event is mixed rather than when it is heard, and must return quickly."""
+        if onetime:
+            type |= BASS_SYNC_ONETIME
+        if mixtime:
+            type |= BASS_SYNC_MIXTIME
+
+        def callback(sync, channel, data, user):
+            if onetime:
+                self.syncs.pop(sync, None)
+            func(sync, channel, data)
+        proc = SYNCPROC(callback)
+        sync = bass_call(
+            BASS_ChannelSetSync,
+            self.handle,
+            type & 0xffffffff,
+            param,
+            proc,
+            None)
+        self.syncs[sync] = proc  # BASS doesn't keep a reference
+        return sync
+
+    def remove_sync(self, sync):
+        self.syncs.pop(sync, None)
+        return bass_call(BASS_ChannelRemoveSync, self.handle, sync)
 
     def bytes_to_seconds(self, position=None):
         """Translates a byte position into time (seconds), based on a channel's format."""
@@ -277,6 +332,20 @@ class Channel (FlagObject):
         bass_call_0(BASS_ChannelGetData, self.handle, pointer(buf), length)
         return buf
 
+    def get_data_into(self, buffer, float=None, flags=0):
+        """Fills a caller-owned buffer (NumPy array, bytearray, memoryview...) in place with interleaved sample data and returns the number of bytes written. Pass a float32 buffer (or float=True) to receive floating-point samples, otherwise 16-bit samples are returned.
+
+        Raises BassError on failure; at the end of a decoding channel its code is BASS_ERROR_ENDED."""
+        if float is None:
+            float = _buffer_format(buffer) == 'f'
+        if float:
+            flags |= BASS_DATA_FLOAT
+        return bass_call_dword(
+            BASS_ChannelGetData,
+            self.handle,
+            address_of(buffer),
+            buffer_size(buffer) | flags)
+
 
 # This is less and less of a one-to-one mapping,
 # But I feel that it's better to be consistent with ourselves
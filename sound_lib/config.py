@@ -1,10 +1,13 @@
-import collections
 import ctypes
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 from sound_lib.external import pybass
 from sound_lib.main import bass_call, bass_call_0
 
 
-class BassConfig(collections.Mapping):
+class BassConfig(Mapping):
     config_map = {
         '3d_algorithm': pybass.BASS_CONFIG_3DALGORITHM,
         'buffer': pybass.BASS_CONFIG_BUFFER,
@@ -52,7 +55,7 @@ class BassConfig(collections.Mapping):
         return bass_call(pybass.BASS_SetConfig, key, val)
 
     def __iter__(self):
-        for key in self.config_map.iterkeys():
+        for key in self.config_map.keys():
             yield key
 
     def __len__(self):
@@ -0,0 +1,189 @@
+from __future__ import absolute_import
+import os
+import numpy
+from .external.pybass import *
+from .dsp import DSP
+from .main import BassError
+
+
+def read_impulse_response(filename, sample_rate=None):
+    """Reads an impulse response as a float32 array of shape (frames, channels). .npy files are loaded with NumPy (and assumed to be at sample_rate already); anything else is decoded with BASS. The IR is resampled to sample_rate if given."""
+    if filename.endswith('.npy'):
+        ir = numpy.load(filename).astype(numpy.float32)
+        if ir.ndim == 1:
+            ir = ir[:, None]
+        return ir
+    from .stream import FileStream
+    s = FileStream(file=filename, decode=True, flags=BASS_SAMPLE_FLOAT)
+    try:
+        info = s.get_info()
+        data = numpy.empty(s.get_length() // 4, dtype=numpy.float32)
+        done = 0
+        while done < data.nbytes:
+            try:
+                got = s.get_data_into(data[done // 4:])
+            except BassError:  # BASS_ERROR_ENDED: get_length() overestimated
+                break
+            if got <= 0:
+                break
+            done += got
+        # end while
+    finally:
+        s.free()
+    frames = done // (4 * info.chans)
+    ir = data[:frames * info.chans].reshape(-1, info.chans)
+    if sample_rate and info.freq != sample_rate:
+        ir = resample(ir, info.freq, sample_rate)
+    return ir
+
+
+def resample(data, source_rate, target_rate):
+    """Linear-interpolation resampling of a (frames, channels) array. Good enough for impulse responses."""
+    frames = int(round(len(data) * float(target_rate) / source_rate))
+    src = numpy.arange(len(data))
+    dst = numpy.linspace(0, len(data) - 1, frames)
+    res = numpy.empty((frames, data.shape[1]), dtype=numpy.float32)
+    for c in range(data.shape[1]):
+        res[:, c] = numpy.interp(dst, src, data[:, c])
+    return res
+
+
+def partition(ir, block_size):
+    """Splits an IR into block_size partitions and returns their spectra, shape (partitions, block_size + 1, channels)."""
+    count = max(1, -(-len(ir) // block_size))
+    flat = numpy.zeros((count * block_size, ir.shape[1]))
+    flat[:len(ir)] = ir
+    # Each partition is zero-padded to 2 * block_size for overlap-save.
+    padded = numpy.zeros((count, 2 * block_size, ir.shape[1]))
+    padded[:, :block_size] = flat.reshape(count, block_size, ir.shape[1])
+    return numpy.fft.rfft(padded, axis=1)
+
+
+class IRCache(object):
+    """Keeps partitioned IR spectra so that loading, resampling and transforming an IR happens once per (file, sample rate, block size)."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, filename, sample_rate, block_size, normalize=True):
+        key = (os.path.abspath(filename), sample_rate, block_size, normalize)
+        spectra = self.entries.get(key)
+        if spectra is None:
+            ir = read_impulse_response(filename, sample_rate)
+            if normalize:
+                ir = normalize_ir(ir)
+            spectra = partition(ir, block_size)
+            self.entries[key] = spectra
+        return spectra
+
+    def clear(self):
+        self.entries.clear()
+
+
+ir_cache = IRCache()
+
+
+def normalize_ir(ir):
+    """Scales an IR to unit energy so that wet levels are comparable between IRs."""
+    energy = numpy.sqrt((ir.astype(numpy.float64) ** 2).sum() / ir.shape[1])
+    if energy == 0:
+        return ir
+    return (ir / energy).astype(numpy.float32)
+
+
+class Convolver(object):
+    """Uniformly partitioned overlap-save convolution.
+
+    Input of any length is cut into block_size blocks. Each block is transformed once and kept in a frequency-domain delay line, and the output spectrum is the sum of the delayed input spectra multiplied by the IR partitions. Latency is block_size frames."""
+
+    def __init__(self, spectra, block_size, chans):
+        self.spectra = spectra
+        self.block_size = block_size
+        self.chans = chans
+        self.partitions = len(spectra)
+        self.delay_line = numpy.zeros(
+            (self.partitions, block_size + 1, chans), dtype=numpy.complex128)
+        self.position = 0
+        self.window = numpy.zeros((2 * block_size, chans))
+        self.in_block = numpy.zeros((block_size, chans))
+        self.out_block = numpy.zeros((block_size, chans))
+        self.fill = 0
+
+    def reset(self):
+        self.delay_line[:] = 0
+        self.window[:] = 0
+        self.out_block[:] = 0
+        self.fill = 0
+
+    def process_block(self, block):
+        B = self.block_size
+        P = self.partitions
+        self.window[:B] = self.window[B:]
+        self.window[B:] = block
+        self.position = (self.position - 1) % P
+        self.delay_line[self.position] = numpy.fft.rfft(self.window, axis=0)
+        # delay_line[(position + p) % P] holds the input from p blocks ago.
+        k = P - self.position
+        acc = (self.delay_line[self.position:] * self.spectra[:k]).sum(axis=0)
+        if self.position:
+            acc += (self.delay_line[:self.position] * self.spectra[k:]).sum(axis=0)
+        return numpy.fft.irfft(acc, n=2 * B, axis=0)[B:]
+
+    def process(self, samples, out=None):
+        """Convolves samples (frames, chans) and writes the result to out (samples itself by default)."""
+        if out is None:
+            out = samples
+        B = self.block_size
+        pos = 0
+        n = len(samples)
+        while pos < n:
+            k = min(B - self.fill, n - pos)
+            self.in_block[self.fill:self.fill + k] = samples[pos:pos + k]
+            out[pos:pos + k] = self.out_block[self.fill:self.fill + k]
+            self.fill += k
+            pos += k
+            if self.fill == B:
+                self.out_block[:] = self.process_block(self.in_block)
+                self.fill = 0
+        # end while
+        return out
+
+
+class ConvolutionReverb(DSP):
+    """A convolution reverb DSP. ir is a filename (loaded through ir_cache) or a (frames, channels) array. A mono IR is applied to every channel; an IR with as many channels as the stream is applied per channel.
+
+    Put it on a bus stream so that one convolution serves every voice routed to it."""
+
+    def __init__(self, ir, wet=0.3, dry=1.0, block_size=1024, normalize=True):
+        super(ConvolutionReverb, self).__init__()
+        self.ir = ir
+        self.wet = wet
+        self.dry = dry
+        self.block_size = block_size
+        self.normalize = normalize
+        self.convolver = None
+        self.wet_buffer = None
+
+    def prepare(self, chans, sample_rate):
+        super(ConvolutionReverb, self).prepare(chans, sample_rate)
+        if isinstance(self.ir, str):
+            spectra = ir_cache.get(
+                self.ir, sample_rate, self.block_size, self.normalize)
+        else:
+            ir = numpy.asarray(self.ir, dtype=numpy.float32)
+            if ir.ndim == 1:
+                ir = ir[:, None]
+            if self.normalize:
+                ir = normalize_ir(ir)
+            spectra = partition(ir, self.block_size)
+        if spectra.shape[2] not in (1, chans):
+            spectra = spectra.mean(axis=2, keepdims=True)
+        self.convolver = Convolver(spectra, self.block_size, chans)
+
+    def process(self, samples):
+        if self.wet_buffer is None or len(self.wet_buffer) < len(samples):
+            self.wet_buffer = numpy.empty(samples.shape)
+        wet = self.wet_buffer[:len(samples)]
+        self.convolver.process(samples, wet)
+        samples *= self.dry
+        samples += wet * self.wet
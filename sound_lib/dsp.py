@@ -0,0 +1,221 @@
+from __future__ import absolute_import
+import ctypes
+import math
+import time
+import numpy
+from .external.pybass import *
+from .main import bass_call
+from .synth import _one_pole
+
+_float_dsp_enabled = False
+
+
+def enable_float_dsp():
+    """Makes BASS hand 32-bit float data to every DSP, whatever the channel's sample format. Called automatically when the first DSP is attached."""
+    global _float_dsp_enabled
+    if not _float_dsp_enabled:
+        bass_call(BASS_SetConfig, BASS_CONFIG_FLOATDSP, True)
+        _float_dsp_enabled = True
+
+
+class DSP(object):
+    """Base class of Python DSPs. Subclasses implement process(samples), where samples is a float32 NumPy array of shape (frames, channels) viewing BASS's buffer directly: modify it in place.
+
+    BASS calls DSPs on its mixing thread, so process() should be quick. The time spent in each call is recorded; see get_stats()."""
+
+    def __init__(self):
+        self.enabled = True
+        self.channel = None
+        self.handle = None
+        self.priority = 0
+        self.chans = 1
+        self.sample_rate = None
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        self._proc = DSPPROC(self._callback)
+
+    def attach(self, channel, priority=0):
+        """Sets the DSP on channel. DSPs with higher priority run first."""
+        if self.handle is not None:
+            raise RuntimeError('%s is already attached' % self.__class__.__name__)
+        enable_float_dsp()
+        self.channel = channel
+        self.priority = priority
+        info = channel.get_info()
+        self.prepare(info.chans, info.freq)
+        self.handle = bass_call(
+            BASS_ChannelSetDSP,
+            channel.handle,
+            self._proc,
+            None,
+            priority)
+
+    def prepare(self, chans, sample_rate):
+        """Called with the channel's format before the DSP runs, whether it is attached directly or through a DSPChain. Override it to set up format-dependent state."""
+        self.chans = chans
+        self.sample_rate = sample_rate
+
+    def detach(self):
+        if self.handle is None:
+            return
+        bass_call(BASS_ChannelRemoveDSP, self.channel.handle, self.handle)
+        self.handle = None
+        self.channel = None
+
+    def _callback(self, handle, channel, buffer, length, user):
+        if not self.enabled or not length:
+            return
+        count = length // 4
+        samples = numpy.frombuffer(
+            (ctypes.c_float * count).from_address(buffer),
+            dtype=numpy.float32).reshape(-1, self.chans)
+        self.run(samples)
+
+    def run(self, samples):
+        """Calls process() and records how long it took."""
+        start = time.perf_counter()
+        self.process(samples)
+        elapsed = time.perf_counter() - start
+        self.calls += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def process(self, samples):
+        raise NotImplementedError
+
+    def reset_stats(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def get_stats(self):
+        """Returns call count and average/maximum/last processing time in seconds."""
+        return {
+            'calls': self.calls,
+            'average': self.total_time / self.calls if self.calls else 0.0,
+            'max': self.max_time,
+            'last': self.last_time,
+        }
+
+
+class FunctionDSP(DSP):
+    """Wraps a function taking the samples array."""
+
+    def __init__(self, function):
+        super(FunctionDSP, self).__init__()
+        self.function = function
+
+    def process(self, samples):
+        self.function(samples)
+
+
+class DSPChain(DSP):
+    """Runs several DSPs in order from one BASS DSP, so the buffer is wrapped once and BASS calls into Python once per block. Each member still reports its own timing."""
+
+    def __init__(self, *dsps):
+        super(DSPChain, self).__init__()
+        self.dsps = []
+        for d in dsps:
+            self.add(d)
+
+    def add(self, dsp, priority=0):
+        """Adds a DSP (or a function). Members with higher priority run first; equal priorities keep insertion order."""
+        if not isinstance(dsp, DSP):
+            dsp = FunctionDSP(dsp)
+        dsp.priority = priority
+        if self.sample_rate is not None:
+            dsp.prepare(self.chans, self.sample_rate)
+        self.dsps.append(dsp)
+        self.dsps.sort(key=lambda d: -d.priority)
+        return dsp
+
+    def remove(self, dsp):
+        self.dsps.remove(dsp)
+
+    def prepare(self, chans, sample_rate):
+        super(DSPChain, self).prepare(chans, sample_rate)
+        for d in self.dsps:
+            d.prepare(chans, sample_rate)
+
+    def process(self, samples):
+        for d in self.dsps:
+            if d.enabled:
+                d.run(samples)
+
+
+class Gain(DSP):
+
+    def __init__(self, gain=1.0):
+        super(Gain, self).__init__()
+        self.gain = gain
+
+    def process(self, samples):
+        samples *= self.gain
+
+
+class LowPass(DSP):
+    """One-pole low-pass filter per channel, e.g. for occlusion. Set cutoff (Hz) at any time."""
+
+    def __init__(self, cutoff=1000.0):
+        super(LowPass, self).__init__()
+        self.cutoff = cutoff
+        self.state = None
+
+    def process(self, samples):
+        if self.state is None or len(self.state) != samples.shape[1]:
+            self.state = [0.0] * samples.shape[1]
+        sr = self.sample_rate
+        a = 1.0 - math.exp(-2 * math.pi * min(self.cutoff, sr / 2) / sr)
+        for c in range(samples.shape[1]):
+            out, self.state[c] = _one_pole(
+                samples[:, c].astype(numpy.float64), a, self.state[c])
+            samples[:, c] = out
+
+
+class BitCrush(DSP):
+    """Reduces bit depth and sample rate (downsample holds every Nth sample)."""
+
+    def __init__(self, bits=8, downsample=1):
+        super(BitCrush, self).__init__()
+        self.bits = bits
+        self.downsample = downsample
+
+    def process(self, samples):
+        if self.downsample > 1:
+            held = samples[::self.downsample]
+            samples[:] = numpy.repeat(held, self.downsample, axis=0)[
+                :len(samples)]
+        steps = float(2 ** (self.bits - 1))
+        numpy.round(samples * steps, out=samples)
+        samples /= steps
+
+
+def constant_power(pan):
+    angle = (pan + 1) * math.pi / 4
+    return math.cos(angle), math.sin(angle)
+
+
+def linear(pan):
+    return (1 - pan) / 2, (1 + pan) / 2
+
+
+class Pan(DSP):
+    """Pans a stereo channel with a custom law. law takes pan (-1 to 1) and returns (left gain, right gain); constant_power and linear are provided. The input is summed to mono first."""
+
+    def __init__(self, pan=0.0, law=constant_power):
+        super(Pan, self).__init__()
+        self.pan = pan
+        self.law = law
+
+    def process(self, samples):
+        if samples.shape[1] != 2:
+            return
+        left, right = self.law(self.pan)
+        mono = samples.sum(axis=1) * 0.5
+        numpy.multiply(mono, left, out=samples[:, 0])
+        numpy.multiply(mono, right, out=samples[:, 1])
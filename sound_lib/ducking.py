@@ -0,0 +1,103 @@
+from __future__ import absolute_import
+from .external.pybassmix import *
+from .main import bass_call_0, BassError
+from .analysis import unpack_level
+
+
+def decibels_to_gain(db):
+    return 10 ** (db / 20.0)
+
+
+class _Target(object):
+
+    def __init__(self, bus, gain):
+        self.bus = bus
+        self.gain = gain
+
+
+class DuckingController(object):
+    """Lowers the volume of some buses while others are active, like a sidechain compressor.
+
+    Buses are decoding Mixers (or any decoding channels) added to a master Mixer. Each duck is written as one volume envelope per target bus: down over attack, held, then back up over release. BASS runs the envelope, so nothing is written per frame and the music comes back on time even if the game stalls; retriggering while ducked only extends the hold.
+
+    Activity comes from trigger() (e.g. a UI sound of known length or speech) and from watched buses: update() reads their levels from the master mixer and triggers while one is above its threshold."""
+
+    def __init__(self, master, attack=0.05, release=0.6, hold=0.3):
+        self.master = master
+        self.attack = attack
+        self.release = release
+        self.hold = hold
+        self.targets = []
+        self.watched = []
+        self.ducked_until = 0
+        self.triggers = 0
+
+    def add_target(self, bus, depth=-12.0):
+        """Ducks bus by depth dB."""
+        self.targets.append(_Target(bus, decibels_to_gain(depth)))
+
+    def remove_target(self, bus):
+        for target in [t for t in self.targets if t.bus is bus]:
+            self.targets.remove(target)
+            self.master.set_envelope(bus, [(0, 1.0)])
+        # end for
+
+    def watch(self, bus, threshold=-40.0):
+        """Ducks the targets while bus is louder than threshold dBFS. bus must have been added to the master with buffer=True so its level can be read."""
+        self.watched.append((bus, decibels_to_gain(threshold)))
+
+    def unwatch(self, bus):
+        self.watched = [w for w in self.watched if w[0] is not bus]
+
+    def trigger(self, duration=0.0):
+        """Ducks the targets for duration seconds (plus hold) from now. Extends a duck in progress."""
+        freq = self.master.freq
+        now = self.master.get_mix_frame()
+        until = now + int((duration + self.hold) * freq)
+        # Rewriting the envelope restarts the attack, so only extend it
+        # when the new end is noticeably later.
+        if until <= self.ducked_until + int(self.hold * freq / 4):
+            return
+        attack = int(self.attack * freq)
+        release = int(self.release * freq)
+        held = max(attack, until - now)
+        for target in self.targets:
+            current = self.master.get_envelope_value(target.bus)
+            if current is None:
+                current = 1.0
+            self.master.set_envelope(target.bus, [
+                (0, current),
+                (attack, target.gain),
+                (held, target.gain),
+                (held + release, 1.0),
+            ])
+        # end for
+        self.ducked_until = now + held
+        self.triggers += 1
+
+    def release_now(self):
+        """Brings the targets back up over the release time."""
+        release = int(self.release * self.master.freq)
+        for target in self.targets:
+            self.master.ramp(target.bus, 1.0, release)
+        # end for
+        self.ducked_until = 0
+
+    def is_ducked(self):
+        return self.master.get_mix_frame() < self.ducked_until
+
+    def get_bus_level(self, bus):
+        """Returns the peak level of a watched bus (0 to 1) over the most recent output."""
+        try:
+            level = bass_call_0(BASS_Mixer_ChannelGetLevel, bus.handle)
+        except BassError:
+            return 0.0
+        return max(unpack_level(level))
+
+    def update(self):
+        """Checks the watched buses. Call it every frame."""
+        for bus, threshold in self.watched:
+            if self.get_bus_level(bus) > threshold:
+                self.trigger()
+                break
+        # end for
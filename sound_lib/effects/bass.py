@@ -6,11 +6,13 @@ from .effect import SoundEffect
 class Chorus(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_CHORUS
     struct = pybass.BASS_DX8_CHORUS
+    silent_parameters = {'fWetDryMix': 0.0}
 
 
 class Echo(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_ECHO
     struct = pybass.BASS_DX8_ECHO
+    silent_parameters = {'fWetDryMix': 0.0}
 
 
 class Compressor(SoundEffect):
@@ -21,6 +23,7 @@ class Compressor(SoundEffect):
 class Reverb(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_REVERB
     struct = pybass.BASS_DX8_REVERB
+    silent_parameters = {'fReverbMix': -96.0}
 
 
 class Distortion(SoundEffect):
@@ -31,6 +34,7 @@ class Distortion(SoundEffect):
 class Flanger(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_FLANGER
     struct = pybass.BASS_DX8_FLANGER
+    silent_parameters = {'fWetDryMix': 0.0}
 
 
 class Gargle(SoundEffect):
@@ -41,8 +45,10 @@ class Gargle(SoundEffect):
 class I3DL2Reverb(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_I3DL2REVERB
     struct = pybass.BASS_DX8_I3DL2REVERB
+    silent_parameters = {'lRoom': -10000}
 
 
 class ParamEq(SoundEffect):
     effect_type = pybass.BASS_FX_DX8_PARAMEQ
     struct = pybass.BASS_DX8_PARAMEQ
+    silent_parameters = {'fGain': 0.0}
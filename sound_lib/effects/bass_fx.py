@@ -1,15 +1,18 @@
+from __future__ import absolute_import
 from sound_lib.external import pybass_fx
-from effect import SoundEffect
+from .effect import SoundEffect
 
 
 class Volume(SoundEffect):
     effect_type = pybass_fx.BASS_FX_BFX_VOLUME
     struct = pybass_fx.BASS_BFX_VOLUME
+    silent_parameters = {'fVolume': 1.0}
 
 
 class PeakEq(SoundEffect):
     effect_type = pybass_fx.BASS_FX_BFX_PEAKEQ
     struct = pybass_fx.BASS_BFX_PEAKEQ
+    silent_parameters = {'fGain': 0.0}
 
 
 class DAmp(SoundEffect):
@@ -0,0 +1,259 @@
+from __future__ import absolute_import
+import ctypes
+import json
+import logging
+import os
+import threading
+import time
+from ..external.pybass import BASS_ERROR_NOFX
+from ..main import BassError
+from . import bass
+
+log = logging.getLogger("sound_lib.effects.chain")
+PRESET_DIRECTORY = os.path.join(os.path.dirname(__file__), 'presets')
+
+
+def effect_class(name):
+    """Looks up an effect class by name: DX8 effects from sound_lib.effects.bass, then BASS_FX ones from sound_lib.effects.bass_fx (imported only when needed)."""
+    cls = getattr(bass, name, None)
+    if cls is None:
+        from . import bass_fx
+        cls = getattr(bass_fx, name, None)
+    if cls is None or not hasattr(cls, 'effect_type'):
+        raise ValueError('unknown effect %r' % name)
+    return cls
+
+
+class EffectChain(object):
+    """An ordered list of effects with their parameters. A chain is only a description; apply() sets it on a channel, and the same chain can be applied to any number of channels.
+
+    Effects run in list order. Parameters use BASS field names (fReverbMix) or their pythonic names (reverb_mix)."""
+
+    def __init__(self, effects=None, name=None, priority=0):
+        self.name = name
+        self.priority = priority
+        self.effects = []
+        for e in effects or []:
+            self.add(e['type'], e.get('priority'), **e.get('parameters', {}))
+
+    def add(self, type, priority=None, **parameters):
+        """Appends an effect. type is an effect class or its name."""
+        if not isinstance(type, str):
+            type = type.__name__
+        effect_class(type)  # fail early on typos
+        self.effects.append({
+            'type': type,
+            'priority': priority,
+            'parameters': parameters,
+        })
+        return self
+
+    def _entries(self):
+        """Yields (class, priority, BASS parameters) in processing order. BASS runs higher priorities first."""
+        count = len(self.effects)
+        for i, e in enumerate(self.effects):
+            cls = effect_class(e['type'])
+            priority = e['priority']
+            if priority is None:
+                priority = self.priority + count - i
+            python_to_bass = cls._name_maps()[0]
+            params = {}
+            for k, v in e['parameters'].items():
+                params[python_to_bass.get(k, k)] = v
+            yield cls, priority, params
+
+    def apply(self, channel, fade=0):
+        """Sets the chain on channel (a Channel, a stream used as a bus, or a handle). With fade, fadeable effects ramp in over fade seconds. Returns the AppliedChain."""
+        applied = AppliedChain(self, channel)
+        if fade > 0:
+            applied.set_mix(0.0)
+            Fader([(applied, 0.0, 1.0)], fade).start()
+        else:
+            applied.set_mix(1.0)
+        return applied
+
+    def to_dict(self):
+        return {'name': self.name, 'priority': self.priority,
+                'effects': self.effects}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('effects'), data.get('name'), data.get('priority', 0))
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_preset(name, directory=None):
+    """Loads a preset chain by name (e.g. "cave", "underwater") from directory, which defaults to the presets shipped with sound_lib."""
+    return EffectChain.load(os.path.join(
+        directory or PRESET_DIRECTORY, '%s.json' % name))
+
+
+def list_presets(directory=None):
+    directory = directory or PRESET_DIRECTORY
+    return sorted(os.path.splitext(f)[0]
+                  for f in os.listdir(directory) if f.endswith('.json'))
+
+
+class AppliedChain(object):
+    """The effects of a chain set on one channel.
+
+    set_mix(amount) moves every fadeable effect between its silent parameters (0) and the chain's parameters (1). Effects that can't be faded are present only while amount is at least 0.5. Effects that BASS doesn't provide on this platform (I3DL2Reverb, Compressor and Gargle exist only on Windows) are skipped with a warning."""
+
+    def __init__(self, chain, channel):
+        self.chain = chain
+        self.channel = channel
+        self.mix = None
+        self.slots = []
+        self.unavailable = set()
+        for cls, priority, params in chain._entries():
+            self.slots.append([cls, priority, params, None])
+
+    def _interpolate(self, cls, params, amount):
+        res = dict(params)
+        types = dict(cls.struct._fields_)
+        for k, silent in cls.silent_parameters.items():
+            target = params.get(k)
+            if target is None:
+                continue
+            v = silent + (target - silent) * amount
+            if not issubclass(types[k], ctypes.c_float):
+                v = int(round(v))
+            res[k] = v
+        return res
+
+    def set_mix(self, amount):
+        amount = max(0.0, min(1.0, amount))
+        for i, slot in enumerate(self.slots):
+            cls, priority, params, effect = slot
+            fadeable = any(k in params for k in cls.silent_parameters)
+            wanted = amount > 0 if fadeable else amount >= 0.5
+            if not wanted:
+                if effect is not None:
+                    effect.remove()
+                    slot[3] = None
+                continue
+            if i in self.unavailable:
+                continue
+            if effect is None:
+                try:
+                    effect = cls(self.channel, priority=priority)
+                except BassError as e:
+                    if e.code != BASS_ERROR_NOFX:
+                        raise
+                    log.warning("%s is not available on this platform; skipped" % cls.__name__)
+                    self.unavailable.add(i)
+                    continue
+                slot[3] = effect
+            effect.set_parameters(
+                self._interpolate(cls, params, amount) if fadeable else params)
+        self.mix = amount
+
+    @property
+    def effects(self):
+        return [s[3] for s in self.slots if s[3] is not None]
+
+    def remove(self):
+        self.set_mix(0.0)
+
+
+class Fader(threading.Thread):
+    """Moves AppliedChain mixes linearly over duration seconds on a background thread. targets is a list of (applied_chain, start, end). Chains that end at 0 are removed.
+
+    If setting a mix fails, the error is logged and every chain is moved straight to its end mix. done is called when the fade finishes either way, unless it was cancelled."""
+
+    interval = 0.02
+
+    def __init__(self, targets, duration, done=None):
+        super(Fader, self).__init__()
+        self.daemon = True
+        self.targets = targets
+        self.duration = duration
+        self.done = done
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.join()
+
+    def run(self):
+        try:
+            self._fade()
+        except Exception:
+            log.exception("effect fade failed")
+            self._finish()
+        finally:
+            if self.done is not None and not self.cancelled:
+                self.done()
+
+    def _fade(self):
+        start = time.time()
+        while not self.cancelled:
+            progress = min(1.0, (time.time() - start) / self.duration)
+            for applied, begin, end in self.targets:
+                applied.set_mix(begin + (end - begin) * progress)
+            if progress >= 1.0:
+                break
+            time.sleep(self.interval)
+        # end while
+
+    def _finish(self):
+        for applied, begin, end in self.targets:
+            try:
+                applied.set_mix(end)
+            except Exception:
+                log.exception("could not finish the fade of %r" % applied.chain.name)
+        # end for
+
+
+class EffectSlot(object):
+    """Holds the current chain of one channel and crossfades to new ones. Apply environments to a bus stream that many voices feed, so changing rooms touches one set of effects instead of one per voice."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.current = None
+        self.fading_out = []
+        self.fader = None
+
+    def set_chain(self, chain, fade=0.5):
+        """Switches to chain (an EffectChain, a preset name, or None for no effects), crossfading over fade seconds."""
+        if isinstance(chain, str):
+            chain = load_preset(chain)
+        if self.fader is not None:
+            self.fader.cancel()
+            self.fader = None
+        for applied in self.fading_out:
+            applied.remove()
+        self.fading_out = []
+        old = self.current
+        self.current = None
+        if chain is not None:
+            self.current = AppliedChain(chain, self.channel)
+            self.current.set_mix(1.0 if fade <= 0 else 0.0)
+        if fade <= 0:
+            if old is not None:
+                old.remove()
+            return self.current
+        targets = []
+        if self.current is not None:
+            targets.append((self.current, 0.0, 1.0))
+        if old is not None:
+            targets.append((old, old.mix, 0.0))
+            self.fading_out.append(old)
+        self.fader = Fader(targets, fade, self._fade_done)
+        self.fader.start()
+        return self.current
+
+    def _fade_done(self):
+        self.fading_out = []
+        self.fader = None
+
+    def clear(self, fade=0.5):
+        return self.set_chain(None, fade)
@@ -1,83 +1,159 @@
 from sound_lib.main import bass_call
+from sound_lib.registry import registry
+import contextlib
 import ctypes
+import re
 from sound_lib.external import pybass
-import string  # for the alphabet!
+
+_upper = re.compile('([A-Z])')
 
 
 class SoundEffect(object):
+    """An effect set on a channel. Its parameters are exposed as attributes with pythonic names (fReverbMix becomes reverb_mix).
+
+    The parameters are kept in a struct cached on the instance, so reading an attribute doesn't call BASS. Use update() or transaction() to change several parameters with one BASS_FXSetParameters call."""
+
+    struct = None
+    # BASS field values at which the effect is inaudible, used to fade it in and out. Effects without such values are switched on and off.
+    silent_parameters = {}
 
     def __init__(self, channel, type=None, priority=0):
         self.original_channel = channel
         if hasattr(channel, 'handle'):
             channel = channel.handle
+        self.channel_handle = channel
         if type is None:
             type = self.effect_type
         self.effect_type = type
         self.priority = priority
+        self._transaction_depth = 0
+        self._dirty = False
         self.handle = bass_call(
             pybass.BASS_ChannelSetFX,
             channel,
             type,
             priority)
+        registry.register(self)
+        self._params = self.struct() if self.struct is not None else None
+        if self._params is not None:
+            self.refresh()
 
-    def get_parameters(self):
-        """Retrieves the parameters of an effect."""
-        res = {}
-        params = self.struct()
+    @classmethod
+    def _name_maps(cls):
+        """Returns (python_to_bass, bass_to_python) dicts. They are built once per effect class."""
+        maps = cls.__dict__.get('_name_maps_cache')
+        if maps is None:
+            bass_to_python = {}
+            for field in cls._get_effect_fields():
+                if not field.startswith('_'):
+                    bass_to_python[field] = cls._bass_to_python(field)
+            python_to_bass = dict((v, k) for k, v in bass_to_python.items())
+            maps = (python_to_bass, bass_to_python)
+            cls._name_maps_cache = maps
+        return maps
+
+    def remove(self):
+        """Removes the effect from its channel."""
+        registry.unregister(self)
+        bass_call(pybass.BASS_ChannelRemoveFX, self.channel_handle, self.handle)
+        self.handle = None
+
+    def reset(self):
+        """Clears the effect's internal state (reverb tails, delay lines...)."""
+        bass_call(pybass.BASS_FXReset, self.handle)
+
+    def refresh(self):
+        """Re-reads the parameters from BASS into the cached struct."""
         bass_call(
             pybass.BASS_FXGetParameters,
             self.handle,
-            ctypes.pointer(params))
-        for f in params._fields_:
-            res[f[0]] = getattr(params, f[0])
+            ctypes.pointer(self._params))
+
+    def get_parameters(self):
+        """Retrieves the parameters of an effect."""
+        self.refresh()
+        res = {}
+        for f in self._get_effect_fields():
+            res[f] = getattr(self._params, f)
         return res
 
     def set_parameters(self, parameters):
-        params = self.struct()
+        """Sets parameters by their BASS field names. Fields not given keep their current values."""
         for p, v in parameters.items():
-            setattr(params, p, v)
+            setattr(self._params, p, v)
+        self._commit()
+
+    def update(self, **params):
+        """Sets parameters by their pythonic names with a single BASS call."""
+        python_to_bass = self._name_maps()[0]
+        for k, v in params.items():
+            if k not in python_to_bass:
+                raise AttributeError(
+                    '%s has no parameter %r' % (self.__class__.__name__, k))
+            setattr(self._params, python_to_bass[k], v)
+        self._commit()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Defers parameter writes until the block exits, then commits them all at once.
+
+            with reverb.transaction():
+                reverb.reverb_mix = -6
+                reverb.reverb_time = 2000
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0 and self._dirty:
+                self._commit()
+
+    def _commit(self):
+        if self._transaction_depth:
+            self._dirty = True
+            return
+        self._dirty = False
         bass_call(
             pybass.BASS_FXSetParameters,
             self.handle,
-            ctypes.pointer(params))
+            ctypes.pointer(self._params))
 
     def __dir__(self):
         res = dir(self.__class__)
         return res + self._get_pythonic_effect_fields()
 
-    def _get_effect_fields(self):
-        return [i[0] for i in self.struct._fields_]
+    @classmethod
+    def _get_effect_fields(cls):
+        if cls.struct is None:
+            return []
+        return [i[0] for i in cls.struct._fields_]
 
     def _get_pythonic_effect_fields(self):
-        return [self._bass_to_python(
-            i) for i in self._get_effect_fields() if not i.startswith('_')]
+        return list(self._name_maps()[0])
 
-    def _bass_to_python(self, func):
-        for c in string.ascii_lowercase:
-            func = func.replace(c.upper(), '_%s' % c)
+    @staticmethod
+    def _bass_to_python(func):
+        func = _upper.sub(lambda m: '_' + m.group(1).lower(), func)
         if func.startswith('_'):
             func = func[1:]
         return func[2:]
 
     def _python_to_bass(self, func):
-        for c in string.ascii_lowercase:
-            func = func.replace('_%s' % c, c.upper())
-        func = '%s%s' % (func[0].upper(), func[1:])
-        for f in self._get_effect_fields():
-            if f.endswith(func):
-                func = f
-        return func
+        return self._name_maps()[0].get(func, func)
 
     def __getattr__(self, attr):
-        return self.get_parameters()[self._python_to_bass(attr)]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        python_to_bass = self._name_maps()[0]
+        if attr not in python_to_bass:
+            raise AttributeError(
+                '%s has no attribute %r' % (self.__class__.__name__, attr))
+        return getattr(self._params, python_to_bass[attr])
 
     def __setattr__(self, attr, val):
-        if attr not in self._get_pythonic_effect_fields():
+        python_to_bass = self._name_maps()[0]
+        if attr not in python_to_bass:
             return super(SoundEffect, self).__setattr__(attr, val)
-        params = self.get_parameters()
-        key = self._python_to_bass(attr)
-        if key not in params:
-            raise AttributeError(
-                'Unable to set attribute, suspect issue with base name-munging code')
-        params[key] = val
-        self.set_parameters(params)
+        setattr(self._params, python_to_bass[attr], val)
+        self._commit()
@@ -19,14 +19,15 @@ class Tempo(BaseStream):
             autofree=False,
             decode=False,
             free_source=False):
+        self.setup_flag_mapping()
         flags = flags | self.flags_for(
-            loop=False,
-            software=False,
-            three_d=False,
-            sample_fx=False,
-            autofree=False,
-            decode=False,
-            free_source=False)
+            loop=loop,
+            software=software,
+            three_d=three_d,
+            fx=sample_fx,
+            autofree=autofree,
+            decode=decode,
+            free_source=free_source)
         self.channel = channel
         if isinstance(channel, Channel):
             channel = channel.handle
@@ -1,5 +1,6 @@
-from external import pybass, pybassenc
-from main import bass_call, bass_call_0, FlagObject
+from __future__ import absolute_import
+from .external import pybass, pybassenc
+from .main import bass_call, bass_call_0, FlagObject
 
 
 class Encoder(FlagObject):
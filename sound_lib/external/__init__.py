@@ -7,4 +7,4 @@ if platform.system() != 'Darwin':
     from . import pybass_aac
     from . import pybass_alac
     from . import pybassflac
-    from . import pybassmidi
+# pybassmidi is loaded on demand by sound_lib.midi.
@@ -69,6 +69,8 @@ func_type = libloader.get_functype()
 
 
 QWORD = ctypes.c_int64
+# c_ulong is 64 bits outside Windows; structure fields must match the 32-bit DWORD.
+DWORD = ctypes.c_uint32
 
 
 def LOBYTE(a): return (ctypes.c_byte)(a)
@@ -328,37 +330,37 @@ WAVE_FORMAT_4S16 = 0x00000800  # 44.1   kHz, Stereo, 16-bit
 
 
 class BASS_SAMPLE(ctypes.Structure):
-    _fields_ = [('freq', ctypes.c_ulong),  # DWORD freq;// default playback rate
+    _fields_ = [('freq', DWORD),  # DWORD freq;// default playback rate
                 # float volume;// default volume (0-1)
                 ('volume', ctypes.c_float),
                 # float pan;// default pan (-1=left, 0=middle, 1=right)
                 ('pan', ctypes.c_float),
                 # DWORD flags;// BASS_SAMPLE_xxx flags
-                ('flags', ctypes.c_ulong),
-                ('length', ctypes.c_ulong),  # DWORD length;// length (in bytes)
+                ('flags', DWORD),
+                ('length', DWORD),  # DWORD length;// length (in bytes)
                 # DWORD max;// maximum simultaneous playbacks
-                ('max', ctypes.c_ulong),
+                ('max', DWORD),
                 # DWORD origres;// original resolution bits
-                ('origres', ctypes.c_ulong),
-                ('chans', ctypes.c_ulong),  # DWORD chans;// number of channels
+                ('origres', DWORD),
+                ('chans', DWORD),  # DWORD chans;// number of channels
                 # DWORD mingap;	// minimum gap (ms) between creating channels
-                ('mingap', ctypes.c_ulong),
+                ('mingap', DWORD),
                 # DWORD mode3d;// BASS_3DMODE_xxx mode
-                ('mode3d', ctypes.c_ulong),
+                ('mode3d', DWORD),
                 # float mindist;// minimum distance
                 ('mindist', ctypes.c_float),
                 # float maxdist;// maximum distance
                 ('maxdist', ctypes.c_float),
                 # DWORD iangle;// angle of inside projection cone
-                ('iangle', ctypes.c_ulong),
+                ('iangle', DWORD),
                 # DWORD oangle;// angle of outside projection cone
-                ('oangle', ctypes.c_ulong),
+                ('oangle', DWORD),
                 # float outvol;// delta-volume outside the projection cone
                 ('outvol', ctypes.c_float),
                 # DWORD vam;// voice allocation/management flags (BASS_VAM_xxx)
-                ('vam', ctypes.c_ulong),
+                ('vam', DWORD),
                 # DWORD priority;// priority (0=lowest, 0xffffffff=highest)
-                ('priority', ctypes.c_ulong)
+                ('priority', DWORD)
                 ]
 
 
@@ -440,15 +442,15 @@ BASS_VAM_TERM_PRIO = 16
 
 
 class BASS_CHANNELINFO(ctypes.Structure):
-    _fields_ = [('freq', ctypes.c_ulong),  # DWORD freq;// default playback rate
-                ('chans', ctypes.c_ulong),  # DWORD chans;// channels
+    _fields_ = [('freq', DWORD),  # DWORD freq;// default playback rate
+                ('chans', DWORD),  # DWORD chans;// channels
                 # DWORD flags;// BASS_SAMPLE/STREAM/MUSIC/SPEAKER flags
-                ('flags', ctypes.c_ulong),
-                ('ctype', ctypes.c_ulong),  # DWORD ctype;// type of channel
+                ('flags', DWORD),
+                ('ctype', DWORD),  # DWORD ctype;// type of channel
                 # DWORD origres;// original resolution
-                ('origres', ctypes.c_ulong),
-                ('plugin', HPLUGIN),  # HPLUGIN plugin;// plugin
-                ('sample', HSAMPLE),  # HSAMPLE sample;// sample
+                ('origres', DWORD),
+                ('plugin', DWORD),  # HPLUGIN plugin;// plugin
+                ('sample', DWORD),  # HSAMPLE sample;// sample
                 # const char *filename;// filename
                 ('filename', ctypes.c_char_p)
                 ]
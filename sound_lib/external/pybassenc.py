@@ -1,10 +1,12 @@
 "BASSENC wrapper by Christopher Toth"""
 
+from __future__ import absolute_import
+
 import ctypes
 import os
 import platform
-import pybass
-from paths import x86_path, x64_path
+from . import pybass
+from .paths import x86_path, x64_path
 import libloader
 
 bassenc_module = libloader.load_library(
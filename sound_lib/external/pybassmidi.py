@@ -38,6 +38,7 @@ QWORD = pybass.QWORD
 HSTREAM = pybass.HSTREAM
 DOWNLOADPROC = pybass.DOWNLOADPROC
 BASS_FILEPROCS = pybass.BASS_FILEPROCS
+DWORD = pybass.DWORD
 
 
 # Additional BASS_SetConfig options
@@ -64,7 +65,7 @@ BASS_MIDI_DECAYSEEK = 0x4000
 
 
 class BASS_MIDI_FONT(ctypes.Structure):
-    _fields_ = [('font', HSOUNDFONT),  # HSOUNDFONT font; // soundfont
+    _fields_ = [('font', DWORD),  # HSOUNDFONT font; // soundfont
                 # int preset; // preset number (-1=all)
                 ('preset', ctypes.c_int),
                 ('bank', ctypes.c_int)  # int bank;
@@ -76,19 +77,19 @@ class BASS_MIDI_FONTINFO(ctypes.Structure):
                 ('copyright', ctypes.c_char_p),  # const char *copyright;
                 ('comment', ctypes.c_char_p),  # const char *comment;
                 # DWORD presets; // number of presets/instruments
-                ('presets', ctypes.c_ulong),
+                ('presets', DWORD),
                 # DWORD samsize; // total size (in bytes) of the sample data
-                ('samsize', ctypes.c_ulong),
+                ('samsize', DWORD),
                 # DWORD samload; // amount of sample data currently loaded
-                ('samload', ctypes.c_ulong),
+                ('samload', DWORD),
                 # DWORD samtype; // sample format (CTYPE) if packed
-                ('samtype', ctypes.c_ulong)
+                ('samtype', DWORD)
                 ]
 
 
 class BASS_MIDI_MARK(ctypes.Structure):
-    _fields_ = [('track', ctypes.c_ulong),  # DWORD track; // track containing marker
-                ('pos', ctypes.c_ulong),  # DWORD pos; // marker position (bytes)
+    _fields_ = [('track', DWORD),  # DWORD track; // track containing marker
+                ('pos', DWORD),  # DWORD pos; // marker position (bytes)
                 ('text', ctypes.c_char_p)  # const char *text; // marker text
                 ]
 
@@ -156,12 +157,12 @@ MIDI_EVENT_TRANSPOSE = 0x10001
 
 
 class BASS_MIDI_EVENT(ctypes.Structure):
-    _fields_ = [('event', ctypes.c_ulong),  # DWORD event; // MIDI_EVENT_xxx
-                ('param', ctypes.c_ulong),  # DWORD param;
-                ('chan', ctypes.c_ulong),  # DWORD chan;
+    _fields_ = [('event', DWORD),  # DWORD event; // MIDI_EVENT_xxx
+                ('param', DWORD),  # DWORD param;
+                ('chan', DWORD),  # DWORD chan;
                 # DWORD tick; // event position (ticks)
-                ('tick', ctypes.c_ulong),
-                ('pos', ctypes.c_ulong)  # DWORD pos; // event position (bytes)
+                ('tick', DWORD),
+                ('pos', DWORD)  # DWORD pos; // event position (bytes)
                 ]
 
 
@@ -268,6 +269,21 @@ BASS_MIDI_StreamGetChannel = func_type(
     HSTREAM, HSTREAM, ctypes.c_ulong)(
         ('BASS_MIDI_StreamGetChannel', bassmidi_module))
 
+# BASS_MIDI_StreamEvents modes
+BASS_MIDI_EVENTS_STRUCT = 0  # BASS_MIDI_EVENT structures
+BASS_MIDI_EVENTS_RAW = 0x10000  # raw MIDI event data
+BASS_MIDI_EVENTS_SYNC = 0x1000000  # flag: trigger event syncs
+BASS_MIDI_EVENTS_NORSTATUS = 0x2000000  # flag: no running status
+BASS_MIDI_EVENTS_CANCEL = 0x4000000  # flag: cancel pending events
+BASS_MIDI_EVENTS_TIME = 0x8000000  # flag: delta-time info is present
+BASS_MIDI_EVENTS_ABSTIME = 0x10000000  # flag: absolute time info is present
+
+# DWORD BASSMIDIDEF(BASS_MIDI_StreamEvents)(HSTREAM handle, DWORD mode,
+# const void *events, DWORD length);
+BASS_MIDI_StreamEvents = func_type(
+    ctypes.c_ulong, HSTREAM, ctypes.c_ulong, ctypes.c_void_p, ctypes.c_ulong)(
+        ('BASS_MIDI_StreamEvents', bassmidi_module))
+
 # HSOUNDFONT BASSMIDIDEF(BASS_MIDI_FontInit)(const void *file, DWORD flags);
 BASS_MIDI_FontInit = func_type(
     HSOUNDFONT, ctypes.c_void_p, ctypes.c_ulong)(
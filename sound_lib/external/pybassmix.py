@@ -2,6 +2,8 @@
 # http://vosolok2008.narod.ru
 # BSD license
 
+from __future__ import absolute_import
+
 __version__ = '0.1'
 __versionTime__ = '2009-11-15'
 __author__ = 'Max Kolosov <maxkolosov@inbox.ru>'
@@ -17,7 +19,7 @@ import os
 import sys
 import ctypes
 import platform
-import pybass
+from . import pybass
 
 QWORD = pybass.QWORD
 HSYNC = pybass.HSYNC
@@ -26,7 +28,7 @@ DOWNLOADPROC = pybass.DOWNLOADPROC
 SYNCPROC = pybass.SYNCPROC
 BASS_FILEPROCS = pybass.BASS_FILEPROCS
 
-from paths import x86_path, x64_path
+from .paths import x86_path, x64_path
 import libloader
 
 bassmix_module = libloader.load_library(
@@ -42,6 +44,7 @@ BASS_CONFIG_SPLIT_BUFFER = 0x10610
 BASS_MIXER_END = 0x10000  # end the stream when there are no sources
 BASS_MIXER_NONSTOP = 0x20000  # don't stall when there are no sources
 BASS_MIXER_RESUME = 0x1000  # resume stalled immediately upon new/unpaused source
+BASS_MIXER_POSEX = 0x2000  # enable BASS_Mixer_ChannelGetPositionEx support
 
 # source flags
 BASS_MIXER_FILTER = 0x1000  # resampling filter
@@ -57,7 +60,7 @@ BASS_MIXER_NORAMPIN = 0x800000  # don't ramp-in the start
 
 
 class BASS_MIXER_NODE(ctypes.Structure):
-    _fields_ = [('pos', ctypes.c_ulong),  # QWORD pos;
+    _fields_ = [('pos', QWORD),  # QWORD pos;
                 ('value', ctypes.c_float)  # float value;
                 ]
 
@@ -165,13 +168,13 @@ BASS_Mixer_ChannelSetEnvelopePos = func_type(
 # QWORD BASSMIXDEF(BASS_Mixer_ChannelGetEnvelopePos)(DWORD handle, DWORD
 # type, float *value);
 BASS_Mixer_ChannelGetEnvelopePos = func_type(
-    QWORD, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_float)(
+    QWORD, ctypes.c_ulong, ctypes.c_ulong, ctypes.POINTER(ctypes.c_float))(
         ('BASS_Mixer_ChannelGetEnvelopePos', bassmix_module))
 
 # HSTREAM BASSMIXDEF(BASS_Split_StreamCreate)(DWORD channel, DWORD flags,
 # int *chanmap);
 BASS_Split_StreamCreate = func_type(
-    HSTREAM, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_int)(
+    HSTREAM, ctypes.c_ulong, ctypes.c_ulong, ctypes.POINTER(ctypes.c_int))(
         ('BASS_Split_StreamCreate', bassmix_module))
 # DWORD BASSMIXDEF(BASS_Split_StreamGetSource)(HSTREAM handle);
 BASS_Split_StreamGetSource = func_type(
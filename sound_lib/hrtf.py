@@ -0,0 +1,290 @@
+from __future__ import absolute_import
+import math
+import threading
+import numpy
+from .external.pybass import *
+from .main import BassError
+from .stream import DecoupledStream
+
+SPEED_OF_SOUND = 343.0
+HEAD_RADIUS = 0.0875
+
+
+def direction_vectors(azimuth, elevation):
+    """Converts SOFA-style angles in degrees (azimuth 0 = front, 90 = left; elevation 90 = up) to unit vectors in BASS's listener frame (x right, y up, z front)."""
+    az = numpy.radians(azimuth)
+    el = numpy.radians(elevation)
+    return numpy.stack([
+        -numpy.cos(el) * numpy.sin(az),
+        numpy.sin(el),
+        numpy.cos(el) * numpy.cos(az),
+    ], axis=-1)
+
+
+class HRIRSet(object):
+    """A set of head-related impulse responses. directions is (N, 3) unit vectors in the listener frame and hrirs is (N, 2, taps), left ear first.
+
+    Load measured sets with from_sofa() or load() (a .npz file with azimuth, elevation, hrir and sample_rate arrays), or synthesize one with spherical_head()."""
+
+    def __init__(self, directions, hrirs, sample_rate):
+        self.directions = numpy.asarray(directions, dtype=numpy.float64)
+        self.directions /= numpy.linalg.norm(
+            self.directions, axis=1, keepdims=True)
+        self.hrirs = numpy.asarray(hrirs, dtype=numpy.float64)
+        self.sample_rate = sample_rate
+
+    @property
+    def taps(self):
+        return self.hrirs.shape[2]
+
+    @classmethod
+    def load(cls, filename):
+        data = numpy.load(filename)
+        return cls(
+            direction_vectors(data['azimuth'], data['elevation']),
+            data['hrir'],
+            int(data['sample_rate']))
+
+    def save(self, filename):
+        x, y, z = self.directions.T
+        numpy.savez(
+            filename,
+            azimuth=numpy.degrees(numpy.arctan2(-x, z)),
+            elevation=numpy.degrees(numpy.arcsin(numpy.clip(y, -1, 1))),
+            hrir=self.hrirs,
+            sample_rate=self.sample_rate)
+
+    @classmethod
+    def from_sofa(cls, filename):
+        """Reads a SimpleFreeFieldHRIR SOFA file. Needs h5py, which is listed in the requirements files but imported only here."""
+        import h5py
+        with h5py.File(filename, 'r') as f:
+            positions = f['SourcePosition'][:]
+            hrirs = f['Data.IR'][:]
+            rate = int(numpy.ravel(f['Data.SamplingRate'][:])[0])
+        return cls(direction_vectors(
+            positions[:, 0], positions[:, 1]), hrirs, rate)
+
+    @classmethod
+    def spherical_head(
+            cls,
+            sample_rate=44100,
+            taps=256,
+            azimuth_step=10,
+            elevation_step=15,
+            radius=HEAD_RADIUS):
+        """Builds HRIRs from a rigid spherical head model: Woodworth interaural time differences, the Brown-Duda head-shadow filter per ear, and a high-frequency roll-off for sources behind the listener to help front/back discrimination."""
+        azimuths = []
+        elevations = []
+        for el in range(-45, 91, elevation_step):
+            for az in range(0, 360, azimuth_step):
+                azimuths.append(az)
+                elevations.append(el)
+        directions = direction_vectors(
+            numpy.array(azimuths, float), numpy.array(elevations, float))
+        freqs = numpy.fft.rfftfreq(taps, 1.0 / sample_rate)
+        w = 2 * math.pi * freqs
+        w0 = SPEED_OF_SOUND / radius
+        hrirs = numpy.empty((len(directions), 2, taps))
+        base_delay = taps // 8 / float(sample_rate)
+        for i, (x, y, z) in enumerate(directions):
+            lateral = math.asin(max(-1.0, min(1.0, x)))
+            itd = radius / SPEED_OF_SOUND * (abs(lateral) + math.sin(abs(lateral)))
+            back = max(0.0, -z)
+            rear = 1.0 / (1.0 + 1j * back * freqs / 4000.0)
+            for ear, side in ((0, -1.0), (1, 1.0)):
+                # angle between the source and this ear's axis, in degrees
+                incidence = math.degrees(math.acos(max(-1.0, min(1.0, x * side))))
+                alpha = 1.05 + 0.95 * math.cos(math.radians(incidence * 180 / 150.0))
+                shadow = (1 + 1j * alpha * w / (2 * w0)) / (1 + 1j * w / (2 * w0))
+                delay = base_delay + (itd if x * side < 0 else 0.0)
+                spectrum = shadow * rear * numpy.exp(-1j * w * delay)
+                hrirs[i, ear] = numpy.fft.irfft(spectrum, n=taps)
+            # end for
+        # end for
+        hrirs *= numpy.hanning(taps * 2)[taps:] ** 0.5  # taper the tail
+        return cls(directions, hrirs, sample_rate)
+
+    def interpolate(self, direction, count=3):
+        """Returns the HRIR pair for a unit direction, blending the count nearest measured directions by angular distance."""
+        cosines = self.directions.dot(direction)
+        nearest = numpy.argpartition(-cosines, count)[:count]
+        angles = numpy.arccos(numpy.clip(cosines[nearest], -1, 1))
+        if angles.min() < 1e-6:
+            return self.hrirs[nearest[angles.argmin()]]
+        weights = 1.0 / angles
+        weights /= weights.sum()
+        return numpy.tensordot(weights, self.hrirs[nearest], axes=1)
+
+
+class BinauralSource(object):
+    """A sound rendered by a BinauralRenderer. channel must be a decoding channel (decode=True); it is read by the renderer, mixed to mono if needed.
+
+    Set position with set_position() or give follow, any object with get_3d_position() such as a 3D Channel, whose position is read every block."""
+
+    def __init__(self, channel, position=(0.0, 0.0, 1.0), gain=1.0, follow=None):
+        self.channel = channel
+        self.chans = channel.get_info().chans
+        self.position = tuple(position)
+        self.gain = gain
+        self.follow = follow
+        self.finished = False
+        self.buffer = None
+        self.window = None
+        self.spectrum = None
+        self.key = None
+
+    def set_position(self, x, y, z):
+        self.position = (x, y, z)
+
+    def read(self, frames):
+        """Reads the next block as mono float64; pads with silence when the channel ends."""
+        if self.buffer is None or len(self.buffer) != frames * self.chans:
+            self.buffer = numpy.zeros(frames * self.chans, dtype=numpy.float32)
+        got = 0
+        if not self.finished:
+            try:
+                got = self.channel.get_data_into(self.buffer)
+            except BassError:  # BASS_ERROR_ENDED, e.g. right after a full last block
+                got = 0
+        if got < self.buffer.nbytes:
+            self.finished = True
+            self.buffer[got // 4:] = 0
+        block = self.buffer.reshape(frames, self.chans)
+        if self.chans == 1:
+            return block[:, 0].astype(numpy.float64)
+        return block.mean(axis=1, dtype=numpy.float64)
+
+
+class BinauralRenderer(object):
+    """Renders any number of BinauralSources to a stereo headphone stream.
+
+    All sources go through one FFT pipeline per block: their input blocks are transformed together, multiplied by their interpolated HRTFs and summed in the frequency domain, so only one inverse transform per ear is needed whatever the number of sources. When a source moves to a new direction, the old and new filters are crossfaded over the block. Interpolated HRTFs are cached per direction (quantized to resolution degrees).
+
+    The listener position and orientation are read every block from listener (a sound_lib.listener.Listener) if given, otherwise from set_listener()."""
+
+    def __init__(
+            self,
+            hrirs=None,
+            sample_rate=44100,
+            block_size=512,
+            listener=None,
+            resolution=2.0,
+            reference_distance=1.0,
+            lookahead=0.06):
+        if hrirs is None:
+            hrirs = HRIRSet.spherical_head(sample_rate)
+        if hrirs.sample_rate != sample_rate:
+            raise ValueError('HRIR set is at %d Hz, renderer at %d Hz' %
+                             (hrirs.sample_rate, sample_rate))
+        if hrirs.taps > block_size:
+            raise ValueError('block_size must be at least %d' % hrirs.taps)
+        self.hrirs = hrirs
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.listener = listener
+        self.resolution = math.radians(resolution)
+        self.reference_distance = reference_distance
+        self.listener_state = ((0.0, 0.0, 0.0), (0.0, 0.0, 1.0), (0.0, 1.0, 0.0))
+        self.sources = []
+        self.lock = threading.Lock()
+        self.filter_cache = {}
+        self.fade_in = numpy.linspace(0.0, 1.0, block_size)
+        self.stream = DecoupledStream(
+            producer=self.render,
+            freq=sample_rate,
+            chans=2,
+            float=True,
+            lookahead=lookahead,
+            block_length=block_size / float(sample_rate))
+
+    def add_source(self, source):
+        with self.lock:
+            self.sources.append(source)
+        return source
+
+    def remove_source(self, source):
+        with self.lock:
+            self.sources.remove(source)
+
+    def set_listener(self, position, front=(0.0, 0.0, 1.0), top=(0.0, 1.0, 0.0)):
+        self.listener_state = (tuple(position), tuple(front), tuple(top))
+
+    def start(self):
+        self.stream.start()
+
+    def stop(self):
+        self.stream.stop()
+
+    def free(self):
+        self.stream.free()
+
+    def _listener_basis(self):
+        if self.listener is not None:
+            state = self.listener.get_3d_position()
+            p, f, t = state['position'], state['front'], state['top']
+            self.listener_state = ((p.x, p.y, p.z), (f.x, f.y, f.z), (t.x, t.y, t.z))
+        position, front, top = [numpy.array(v, float) for v in self.listener_state]
+        front /= numpy.linalg.norm(front) or 1.0
+        top -= front * top.dot(front)
+        top /= numpy.linalg.norm(top) or 1.0
+        right = numpy.cross(top, front)
+        return position, numpy.stack([right, top, front])
+
+    def _filter(self, direction):
+        """Returns (cache key, HRTF spectra of shape (2, block_size + 1)) for a unit direction in the listener frame."""
+        az = math.atan2(-direction[0], direction[2])
+        el = math.asin(max(-1.0, min(1.0, direction[1])))
+        key = (int(round(az / self.resolution)), int(round(el / self.resolution)))
+        spectrum = self.filter_cache.get(key)
+        if spectrum is None:
+            hrir = self.hrirs.interpolate(direction)
+            spectrum = numpy.fft.rfft(hrir, n=2 * self.block_size, axis=1)
+            self.filter_cache[key] = spectrum
+        return key, spectrum
+
+    def render(self, frames=None):
+        """Renders one block of block_size stereo float32 frames. Called on the DecoupledStream producer thread."""
+        B = self.block_size
+        with self.lock:
+            sources = [s for s in self.sources if not s.finished]
+        out = numpy.zeros((B, 2), dtype=numpy.float32)
+        if not sources:
+            return out
+        origin, basis = self._listener_basis()
+        inputs = numpy.empty((len(sources), 2 * B))
+        old = numpy.empty((len(sources), 2, B + 1), dtype=numpy.complex128)
+        new = numpy.empty_like(old)
+        moved = False
+        for i, s in enumerate(sources):
+            if s.window is None:
+                s.window = numpy.zeros(2 * B)
+            s.window[:B] = s.window[B:]
+            s.window[B:] = s.read(B)
+            inputs[i] = s.window
+            if s.follow is not None:
+                p = s.follow.get_3d_position()['position']
+                s.position = (p.x, p.y, p.z)
+            offset = basis.dot(numpy.array(s.position, float) - origin)
+            distance = numpy.linalg.norm(offset)
+            direction = offset / distance if distance > 1e-9 else numpy.array([0.0, 0.0, 1.0])
+            gain = s.gain * min(1.0, self.reference_distance / max(distance, 1e-9))
+            key, spectrum = self._filter(direction)
+            new[i] = spectrum * gain
+            if s.spectrum is None:
+                s.spectrum = new[i]
+            if s.key != key or not numpy.array_equal(s.spectrum, new[i]):
+                moved = True
+            old[i] = s.spectrum
+            s.spectrum = new[i]
+            s.key = key
+        # end for
+        spectra = numpy.fft.rfft(inputs, axis=1)
+        y = numpy.fft.irfft(
+            numpy.einsum('sf,scf->cf', spectra, new), n=2 * B, axis=1)[:, B:]
+        if moved:
+            y_old = numpy.fft.irfft(
+                numpy.einsum('sf,scf->cf', spectra, old), n=2 * B, axis=1)[:, B:]
+            y = y_old + (y - y_old) * self.fade_in
+        out[:] = y.T
+        return out
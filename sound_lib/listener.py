@@ -1,7 +1,8 @@
+from __future__ import absolute_import
 from ctypes import pointer
 from functools import partial
-from main import bass_call, update_3d_system
-from external.pybass import *
+from .main import bass_call, update_3d_system
+from .external.pybass import *
 
 
 def _getter(base_prop, attr, obj):
@@ -133,15 +134,15 @@ class Listener(object):
 
     top_x = property(
         fget=partial(
-            _getter, 'front', 'x'), fset=partial(
-            _setter, 'front', 'x'))
+            _getter, 'top', 'x'), fset=partial(
+            _setter, 'top', 'x'))
 
     top_y = property(
         fget=partial(
-            _getter, 'front', 'y'), fset=partial(
-            _setter, 'front', 'y'))
+            _getter, 'top', 'y'), fset=partial(
+            _setter, 'top', 'y'))
 
     top_z = property(
         fget=partial(
-            _getter, 'front', 'z'), fset=partial(
-            _setter, 'front', 'z'))
+            _getter, 'top', 'z'), fset=partial(
+            _setter, 'top', 'z'))
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from .external.pybass import *
+from ctypes import addressof, c_char, c_char_p, c_void_p
 from functools import update_wrapper
 
 EAX_ENVIRONMENTS = {
@@ -61,6 +62,45 @@ def bass_call_0(function, *args):
     return res
 
 
+def bass_call_dword(function, *args):
+    """Like bass_call_0, for functions returning a DWORD: their error value -1 comes back from ctypes as 0xFFFFFFFF."""
+    res = function(*args)
+    if res == -1 or res == 0xFFFFFFFF:
+        code = BASS_ErrorGetCode()
+        raise BassError(code, get_error_description(code))
+    return res
+
+
+def address_of(data):
+    """Returns the memory address of a ctypes object, a buffer-protocol object (bytes, bytearray, memoryview, NumPy array...) or an integer address without copying. Buffers must be C-contiguous. Read-only buffers are accepted too; don't pass them to calls that write."""
+    if data is None or isinstance(data, int):
+        return data
+    if isinstance(data, c_void_p):
+        return data.value
+    if isinstance(data, bytes):
+        return c_void_p.from_buffer(c_char_p(data)).value
+    try:
+        # Covers ctypes objects and writable buffers, including NumPy arrays, in one call.
+        return addressof(c_char.from_buffer(data))
+    except (TypeError, ValueError):
+        pass  # read-only, non-contiguous or empty
+    view = memoryview(data)
+    if not view.c_contiguous:
+        raise ValueError('buffer must be C-contiguous')
+    if not view.nbytes:
+        return None
+    # ctypes only maps writable buffers; NumPy maps read-only ones without copying.
+    import numpy
+    return numpy.frombuffer(view, dtype=numpy.uint8).__array_interface__['data'][0]
+
+
+def buffer_size(data):
+    """Returns the size of a buffer-protocol object in bytes."""
+    if hasattr(data, 'nbytes'):
+        return data.nbytes
+    return memoryview(data).nbytes
+
+
 def update_3d_system(func):
     """Decorator to automatically update the 3d system after a function call."""
     def update_3d_system_wrapper(*args, **kwargs):
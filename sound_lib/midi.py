@@ -0,0 +1,423 @@
+from __future__ import absolute_import
+import ctypes
+import heapq
+import math
+import platform
+import sys
+import threading
+from .external.pybass import *
+from .main import bass_call, bass_call_0
+from .stream import BaseStream
+
+try:
+    convert_to_unicode = unicode
+except NameError:
+    convert_to_unicode = str
+
+_library = None
+
+
+def load_library():
+    """Loads BASSMIDI and registers it as a BASS plugin (so FileStream can also open .mid files). Called on first use; the library isn't loaded by merely importing sound_lib."""
+    global _library
+    if _library is None:
+        from .external import pybassmidi
+        _library = pybassmidi
+    return _library
+
+
+def _file_argument(file):
+    """Returns (file, flags) as BASS expects file names on this platform."""
+    if platform.system() == 'Darwin':
+        return file.encode(sys.getfilesystemencoding()), 0
+    return convert_to_unicode(file), BASS_UNICODE
+
+
+def set_auto_compact(enable):
+    """When enabled, BASSMIDI unloads samples that no stream uses any more whenever a stream is freed."""
+    bass_call(BASS_SetConfig, load_library().BASS_CONFIG_MIDI_COMPACT, enable)
+
+
+def set_voices(count):
+    """Sets the default maximum number of voices for new MIDI streams."""
+    bass_call(BASS_SetConfig, load_library().BASS_CONFIG_MIDI_VOICES, count)
+
+
+class SoundFont(object):
+    """An SF2/SF3 soundfont. Use font_cache.acquire() rather than creating fonts directly, so that streams share one loaded copy."""
+
+    def __init__(self, file, flags=0):
+        midi = load_library()
+        self.file = file
+        file, unicode_flag = _file_argument(file)
+        self.handle = bass_call(
+            midi.BASS_MIDI_FontInit, file, flags | unicode_flag)
+        self.references = 0
+
+    def get_info(self):
+        midi = load_library()
+        info = midi.BASS_MIDI_FONTINFO()
+        bass_call(midi.BASS_MIDI_FontGetInfo, self.handle, ctypes.pointer(info))
+        return {
+            'name': info.name,
+            'copyright': info.copyright,
+            'comment': info.comment,
+            'presets': info.presets,
+            'sample_size': info.samsize,
+            'sample_loaded': info.samload,
+        }
+
+    def get_preset_name(self, preset, bank=0):
+        return load_library().BASS_MIDI_FontGetPreset(self.handle, preset, bank)
+
+    def load(self, preset=-1, bank=0):
+        """Loads the samples of a preset (all presets if -1) now, instead of when a note first needs them."""
+        return bass_call(load_library().BASS_MIDI_FontLoad, self.handle, preset, bank)
+
+    def compact(self):
+        """Unloads samples that no stream is using."""
+        return bass_call(load_library().BASS_MIDI_FontCompact, self.handle)
+
+    def get_volume(self):
+        return load_library().BASS_MIDI_FontGetVolume(self.handle)
+
+    def set_volume(self, volume):
+        bass_call(load_library().BASS_MIDI_FontSetVolume, self.handle, volume)
+
+    volume = property(get_volume, set_volume)
+
+    def free(self):
+        if self.handle:
+            bass_call(load_library().BASS_MIDI_FontFree, self.handle)
+            self.handle = None
+
+
+class FontCache(object):
+    """Process-wide cache of loaded soundfonts, reference counted by the streams using them. A font is freed when its last user releases it, unless keep is set (useful for a font every level uses)."""
+
+    def __init__(self):
+        self.fonts = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, file, keep=False):
+        with self.lock:
+            font = self.fonts.get(file)
+            if font is None:
+                font = SoundFont(file)
+                font.keep = keep
+                self.fonts[file] = font
+            font.keep = font.keep or keep
+            font.references += 1
+            return font
+
+    def release(self, font):
+        with self.lock:
+            font.references -= 1
+            if font.references <= 0 and not font.keep:
+                self.fonts.pop(font.file, None)
+                font.free()
+
+    def compact(self):
+        """Unloads the samples no stream is using from every cached font, to bound memory after a song or level change."""
+        with self.lock:
+            for font in self.fonts.values():
+                font.compact()
+            # end for
+
+    def get_memory_usage(self):
+        """Returns the number of bytes of sample data currently loaded across all fonts."""
+        with self.lock:
+            return sum(f.get_info()['sample_loaded'] for f in self.fonts.values())
+
+    def clear(self):
+        with self.lock:
+            for font in self.fonts.values():
+                font.free()
+            self.fonts = {}
+
+
+font_cache = FontCache()
+
+
+class MidiStream(BaseStream):
+    """Plays a MIDI file, or with no file, a realtime stream of channels MIDI channels driven by events.
+
+    fonts is a soundfont file name, a SoundFont, or a list of them (or of (font, preset, bank) tuples mapping one preset); file names go through font_cache. Call preload() before playback so that instruments don't load in the middle of the song."""
+
+    def __init__(
+            self,
+            file=None,
+            fonts=None,
+            channels=16,
+            freq=44100,
+            flags=0,
+            three_d=False,
+            autofree=False,
+            decode=False,
+            decay_end=True):
+        midi = load_library()
+        self.setup_flag_mapping()
+        flags = flags | self.flags_for(
+            three_d=three_d, autofree=autofree, decode=decode)
+        if decay_end:
+            flags |= midi.BASS_MIDI_DECAYEND
+        self.file = file
+        if file is None:
+            handle = bass_call(midi.BASS_MIDI_StreamCreate, channels, flags, freq)
+        else:
+            file, unicode_flag = _file_argument(file)
+            handle = bass_call(
+                midi.BASS_MIDI_StreamCreateFile,
+                False,
+                file,
+                0,
+                0,
+                flags | unicode_flag,
+                freq)
+        super(MidiStream, self).__init__(handle)
+        self.fonts = []
+        self.cached_fonts = []
+        if fonts is not None:
+            self.set_fonts(fonts)
+
+    def set_fonts(self, fonts):
+        """Sets the soundfonts used by this stream, releasing the previous ones. Earlier fonts take precedence."""
+        midi = load_library()
+        if not isinstance(fonts, (list, tuple)) or (
+                len(fonts) == 3 and isinstance(fonts[1], int)):
+            fonts = [fonts]
+        acquired = []
+        cached = []
+        entries = (midi.BASS_MIDI_FONT * len(fonts))()
+        for i, f in enumerate(fonts):
+            preset, bank = -1, 0
+            if isinstance(f, tuple):
+                f, preset, bank = f
+            if not isinstance(f, SoundFont):
+                f = font_cache.acquire(f)
+                cached.append(f)
+            acquired.append(f)
+            entries[i].font = f.handle
+            entries[i].preset = preset
+            entries[i].bank = bank
+        # end for
+        bass_call(midi.BASS_MIDI_StreamSetFonts, self.handle, entries, len(fonts))
+        self._release_fonts()
+        self.fonts = acquired
+        self.cached_fonts = cached
+
+    def _release_fonts(self):
+        for f in self.cached_fonts:
+            font_cache.release(f)
+        self.fonts = []
+        self.cached_fonts = []
+
+    def preload(self):
+        """Loads the samples of every preset the MIDI file uses."""
+        return bass_call(load_library().BASS_MIDI_StreamLoadSamples, self.handle)
+
+    def preload_presets(self, presets):
+        """Loads the given (preset, bank) pairs from the stream's fonts, for realtime streams whose instruments aren't known from a file."""
+        for preset, bank in presets:
+            for f in self.fonts:
+                f.load(preset, bank)
+            # end for
+        # end for
+
+    def event(self, chan, event, param):
+        """Sends one event now."""
+        return bass_call(
+            load_library().BASS_MIDI_StreamEvent, self.handle, chan, event, param)
+
+    def note_on(self, chan, key, velocity=100):
+        return self.event(chan, load_library().MIDI_EVENT_NOTE, key | (velocity << 8))
+
+    def note_off(self, chan, key):
+        return self.event(chan, load_library().MIDI_EVENT_NOTE, key)
+
+    def program_change(self, chan, program):
+        return self.event(chan, load_library().MIDI_EVENT_PROGRAM, program)
+
+    def all_notes_off(self):
+        midi = load_library()
+        for chan in range(16):
+            self.event(chan, midi.MIDI_EVENT_NOTESOFF, 0)
+        # end for
+
+    def get_ppqn(self):
+        return self.get_attribute(load_library().BASS_ATTRIB_MIDI_PPQN)
+
+    def get_tick_position(self):
+        return bass_call_0(
+            BASS_ChannelGetPosition, self.handle, load_library().BASS_POS_MIDI_TICK)
+
+    def free(self):
+        res = super(MidiStream, self).free()
+        self._release_fonts()
+        return res
+
+    def batch(self, absolute=False):
+        """Returns an EventBatch for this stream."""
+        return EventBatch(self, absolute=absolute)
+
+
+class EventBatch(object):
+    """Collects MIDI events and sends them with a single BASS_MIDI_StreamEvents call, instead of one ctypes call per event.
+
+    Each event has a position in sample frames: relative to the start of the next block BASS renders, or, with absolute=True, to the start of the stream. Events are sent in position order; events at the same position keep the order they were added in."""
+
+    def __init__(self, stream, capacity=256, absolute=False):
+        self.stream = stream
+        self.absolute = absolute
+        info = stream.get_info()
+        self.frame_size = info.chans * (4 if info.flags & BASS_SAMPLE_FLOAT else 2)
+        self.events = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        # BASS_MIDI_EVENT is five DWORDs: event, param, chan, tick, pos.
+        self.buffer = (ctypes.c_uint32 * (5 * capacity))()
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, chan, event, param, frame=0):
+        self.events.append((frame, chan, event, param))
+
+    def note_on(self, chan, key, velocity=100, frame=0):
+        self.events.append(
+            (frame, chan, load_library().MIDI_EVENT_NOTE, key | (velocity << 8)))
+
+    def note_off(self, chan, key, frame=0):
+        self.events.append((frame, chan, load_library().MIDI_EVENT_NOTE, key))
+
+    def program_change(self, chan, program, frame=0):
+        self.events.append((frame, chan, load_library().MIDI_EVENT_PROGRAM, program))
+
+    def submit(self):
+        """Sends the collected events and empties the batch. Returns the number of events BASS accepted."""
+        count = len(self.events)
+        if not count:
+            return 0
+        midi = load_library()
+        if count > self.capacity:
+            self._allocate(max(count, self.capacity * 2))
+        self.events.sort(key=lambda e: e[0])
+        flat = []
+        previous = 0
+        for frame, chan, event, param in self.events:
+            frame = int(frame)
+            # With BASS_MIDI_EVENTS_TIME, pos is the delta from the previous event.
+            pos = frame if self.absolute else frame - previous
+            flat.extend((event, param, chan, 0, pos * self.frame_size))
+            previous = frame
+        # end for
+        self.buffer[:len(flat)] = flat
+        mode = midi.BASS_MIDI_EVENTS_STRUCT | (
+            midi.BASS_MIDI_EVENTS_ABSTIME if self.absolute else midi.BASS_MIDI_EVENTS_TIME)
+        self.events = []
+        return bass_call_0(
+            midi.BASS_MIDI_StreamEvents,
+            self.stream.handle,
+            mode,
+            self.buffer,
+            count)
+
+    def cancel_pending(self):
+        """Drops events already sent to BASS that haven't been processed yet."""
+        self.events = []
+        return bass_call_0(
+            load_library().BASS_MIDI_StreamEvents,
+            self.stream.handle,
+            load_library().BASS_MIDI_EVENTS_CANCEL,
+            None,
+            0)
+
+
+class Phrase(object):
+    """A list of MIDI events positioned in beats, to be scheduled with a Sequencer."""
+
+    def __init__(self):
+        self.events = []
+
+    def add_note(self, beat, chan, key, velocity=100, length=1.0):
+        midi = load_library()
+        self.events.append((beat, chan, midi.MIDI_EVENT_NOTE, key | (velocity << 8)))
+        self.events.append((beat + length, chan, midi.MIDI_EVENT_NOTE, key))
+        return self
+
+    def add_event(self, beat, chan, event, param):
+        self.events.append((beat, chan, event, param))
+        return self
+
+    @property
+    def length(self):
+        return max(e[0] for e in self.events) if self.events else 0.0
+
+
+class Sequencer(object):
+    """Schedules phrases on a MidiStream in beats.
+
+    Call update() every frame. Events due within lookahead seconds of the stream's decoding position are sent in one batch with absolute sample positions, so their timing is sample-accurate whatever the frame rate. Changing bpm affects phrases scheduled afterwards."""
+
+    def __init__(self, stream, bpm=120.0, lookahead=0.2):
+        self.stream = stream
+        self.bpm = bpm
+        self.lookahead = lookahead
+        self.freq = stream.get_info().freq
+        self.batch = EventBatch(stream, absolute=True)
+        self.pending = []
+        self.counter = 0
+        self.origin = None
+
+    @property
+    def frames_per_beat(self):
+        return self.freq * 60.0 / self.bpm
+
+    def get_decode_frame(self):
+        position = bass_call_0(
+            BASS_ChannelGetPosition,
+            self.stream.handle,
+            BASS_POS_BYTE | BASS_POS_DECODE)
+        return position // self.batch.frame_size
+
+    def start(self):
+        """Sets beat 0 to the stream's current decoding position."""
+        self.origin = self.get_decode_frame()
+
+    def get_beat(self):
+        if self.origin is None:
+            self.start()
+        return (self.get_decode_frame() - self.origin) / self.frames_per_beat
+
+    def schedule(self, phrase, beat=None, quantize=1.0):
+        """Schedules a Phrase to start at beat, or by default at the first multiple of quantize beats that is still ahead of the lookahead window. Returns the start beat."""
+        if beat is None:
+            earliest = self.get_beat() + self.lookahead * self.bpm / 60.0
+            beat = math.ceil(earliest / quantize) * quantize if quantize else earliest
+        elif self.origin is None:
+            self.start()
+        for offset, chan, event, param in phrase.events:
+            frame = self.origin + (beat + offset) * self.frames_per_beat
+            heapq.heappush(self.pending, (frame, self.counter, chan, event, param))
+            self.counter += 1
+        # end for
+        return beat
+
+    def update(self):
+        """Sends the events due within the lookahead window. Returns how many were sent."""
+        if not self.pending:
+            return 0
+        horizon = self.get_decode_frame() + self.lookahead * self.freq
+        while self.pending and self.pending[0][0] <= horizon:
+            frame, counter, chan, event, param = heapq.heappop(self.pending)
+            self.batch.add(chan, event, param, frame)
+        # end while
+        return self.batch.submit()
+
+    def stop(self):
+        """Drops every scheduled event and silences the stream."""
+        self.pending = []
+        self.batch.cancel_pending()
+        self.stream.all_notes_off()
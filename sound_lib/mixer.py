@@ -0,0 +1,202 @@
+from __future__ import absolute_import
+import ctypes
+from .external.pybass import *
+from .external.pybassmix import *
+from .main import bass_call, bass_call_0, BassError
+from .stream import BaseStream
+
+
+class Mixer(BaseStream):
+    """A BASSmix mixer stream. Sources must be decoding channels (decode=True). They are all mixed by the mixer and share its clock, so sources started together stay in lockstep.
+
+    Positions and delays are in sample frames of the mixer output. get_mix_frame() is how far the mixer has processed, which is ahead of what is heard by about the playback buffer length; anything scheduled after it happens exactly on its frame."""
+
+    def __init__(
+            self,
+            freq=44100,
+            chans=2,
+            flags=0,
+            float=False,
+            nonstop=True,
+            three_d=False,
+            autofree=False,
+            decode=False):
+        self.setup_flag_mapping()
+        flags = flags | self.flags_for(
+            three_d=three_d,
+            autofree=autofree,
+            decode=decode,
+            float=float,
+            nonstop=nonstop)
+        handle = bass_call(BASS_Mixer_StreamCreate, freq, chans, flags)
+        super(Mixer, self).__init__(handle)
+        self.freq = freq
+        self.chans = chans
+        self.frame_size = chans * (4 if float else 2)
+        self.sources = []
+
+    def setup_flag_mapping(self):
+        super(Mixer, self).setup_flag_mapping()
+        self.flag_mapping.update({
+            'float': BASS_SAMPLE_FLOAT,
+            'nonstop': BASS_MIXER_NONSTOP,
+        })
+
+    def add_channel(
+            self,
+            channel,
+            delay=0,
+            length=0,
+            flags=0,
+            paused=False,
+            autofree=False,
+            buffer=False,
+            downmix=False,
+            norampin=False):
+        """Adds a decoding channel. It starts delay frames after the current mix position and, if length is given, is mixed for at most length frames. With autofree, BASS frees the channel when it ends."""
+        if paused:
+            flags |= BASS_MIXER_PAUSE
+        if autofree:
+            flags |= BASS_STREAM_AUTOFREE
+        if buffer:
+            flags |= BASS_MIXER_BUFFER
+        if downmix:
+            flags |= BASS_MIXER_DOWNMIX
+        if norampin:
+            flags |= BASS_MIXER_NORAMPIN
+        bass_call(
+            BASS_Mixer_StreamAddChannelEx,
+            self.handle,
+            channel.handle,
+            flags,
+            int(delay) * self.frame_size,
+            int(length) * self.frame_size)
+        self.sources.append(channel)
+        return channel
+
+    def remove_channel(self, channel):
+        if channel in self.sources:
+            self.sources.remove(channel)
+        return bass_call(BASS_Mixer_ChannelRemove, channel.handle)
+
+    def contains(self, channel):
+        try:
+            return bass_call_0(BASS_Mixer_ChannelGetMixer, channel.handle) == self.handle
+        except BassError:
+            return False
+
+    def prune(self):
+        """Forgets sources that have left the mixer, e.g. autofree sources that ended. Returns them."""
+        gone = [s for s in self.sources if not self.contains(s)]
+        for s in gone:
+            self.sources.remove(s)
+        # end for
+        return gone
+
+    def pause_channel(self, channel, paused=True):
+        return bass_call_0(
+            BASS_Mixer_ChannelFlags,
+            channel.handle,
+            BASS_MIXER_PAUSE if paused else 0,
+            BASS_MIXER_PAUSE)
+
+    def set_source_sync(self, channel, type, param, func, onetime=False, mixtime=False):
+        """Like Channel.set_sync, for an event of a source in this mixer: positions (BASS_SYNC_POS) are in the source's bytes and BASS_SYNC_END fires when the source ends in the mix. A mixtime BASS_SYNC_END sync is where to add the next source for gapless playback."""
+        if onetime:
+            type |= BASS_SYNC_ONETIME
+        if mixtime:
+            type |= BASS_SYNC_MIXTIME
+
+        def callback(sync, handle, data, user):
+            if onetime:
+                channel.syncs.pop(sync, None)
+            func(sync, handle, data)
+        proc = SYNCPROC(callback)
+        sync = bass_call(
+            BASS_Mixer_ChannelSetSync,
+            channel.handle,
+            type & 0xffffffff,
+            param,
+            proc,
+            None)
+        channel.syncs[sync] = proc
+        return sync
+
+    def remove_source_sync(self, channel, sync):
+        channel.syncs.pop(sync, None)
+        return bass_call(BASS_Mixer_ChannelRemoveSync, channel.handle, sync)
+
+    def get_source_position(self, channel, mode=BASS_POS_BYTE):
+        """Returns the position of a source that is being heard, taking the mixer's playback buffer into account."""
+        return bass_call_0(BASS_Mixer_ChannelGetPosition, channel.handle, mode)
+
+    def get_buffered(self):
+        """Returns how many seconds of mixed audio are buffered for playback."""
+        try:
+            available = bass_call_0(
+                BASS_ChannelGetData, self.handle, None, BASS_DATA_AVAILABLE)
+        except BassError:  # decoding mixers have no playback buffer
+            return 0.0
+        return available / float(self.frame_size * self.freq)
+
+    def get_mix_frame(self):
+        """Returns how many frames the mixer has processed."""
+        return bass_call_0(
+            BASS_ChannelGetPosition,
+            self.handle,
+            BASS_POS_BYTE | BASS_POS_DECODE) // self.frame_size
+
+    def get_play_frame(self):
+        """Returns the frame being heard."""
+        return bass_call_0(
+            BASS_ChannelGetPosition,
+            self.handle,
+            BASS_POS_BYTE) // self.frame_size
+
+    def set_envelope(self, channel, nodes, type=BASS_MIXER_ENV_VOL, loop=False):
+        """Sets an envelope on a source. nodes is a list of (frame, value), frames counted from now, or from when the source starts if it was added with a delay. Give a node at frame 0: before the first node BASS moves from 1 to its value. The last value is held. An empty list removes the envelope."""
+        if not nodes:
+            return bass_call(
+                BASS_Mixer_ChannelSetEnvelope, channel.handle, type, None, 0)
+        array = (BASS_MIXER_NODE * len(nodes))()
+        for node, (frame, value) in zip(array, nodes):
+            node.pos = int(frame) * self.frame_size
+            node.value = value
+        # end for
+        if loop:
+            type |= BASS_MIXER_ENV_LOOP
+        return bass_call(
+            BASS_Mixer_ChannelSetEnvelope,
+            channel.handle,
+            type,
+            array,
+            len(nodes))
+
+    def ramp(self, channel, value, frames, delay=0, start=None, type=BASS_MIXER_ENV_VOL):
+        """Moves a source's envelope linearly from start (by default its current value, or 1 without an envelope) to value over frames, beginning delay frames from now. For a source added with a start delay, frames count from when it starts."""
+        if start is None:
+            start = self.get_envelope_value(channel, type)
+            if start is None:
+                start = 1.0
+        nodes = [(0, start)]
+        if delay > 0:
+            nodes.append((delay, start))
+        nodes.append((delay + max(int(frames), 1), value))
+        return self.set_envelope(channel, nodes, type)
+
+    def get_envelope_value(self, channel, type=BASS_MIXER_ENV_VOL):
+        """Returns the current value of a source's envelope, or None if it has none."""
+        value = ctypes.c_float()
+        try:
+            bass_call_0(
+                BASS_Mixer_ChannelGetEnvelopePos,
+                channel.handle,
+                type,
+                ctypes.pointer(value))
+        except BassError:
+            return None
+        return value.value
+
+    def free(self):
+        self.sources = []
+        return super(Mixer, self).free()
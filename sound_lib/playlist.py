@@ -0,0 +1,217 @@
+from __future__ import absolute_import
+import collections
+import threading
+from .external.pybass import *
+from .main import BassError
+from .mixer import Mixer
+from .stream import FileStream
+
+
+class QueuePlayer(object):
+    """Plays a queue of files back to back through a mixer without gaps.
+
+    The next file is opened on a background thread while the current one plays. A mixtime end sync on the current track adds the next one to the mixer, or, with crossfade (seconds), a position sync does so that long before the end and the two cross with mixer envelopes. These syncs fire while the mixer processes the block containing their position, so the next track gets a start delay that puts it exactly on the end (or crossfade point) of the current one. If the next file isn't open in time the gap is counted in get_state() and playback resumes from update(), which should be called regularly anyway to release finished tracks.
+
+    Playback state is changed both by the syncs on the mixer thread and by the game thread. Game-thread methods lock the mixer and then self.lock, the order in which the syncs hold them, so a skip can't race a track change."""
+
+    def __init__(self, mixer=None, crossfade=0.0):
+        if mixer is None:
+            mixer = Mixer(float=True)
+            mixer.play()
+        self.mixer = mixer
+        self.crossfade = crossfade
+        self.queue = collections.deque()
+        self.current = None
+        self.current_name = None
+        self.current_end = 0
+        self.next = None
+        self.next_name = None
+        self.loader = None
+        self.waiting = False
+        self.skipped = []
+        self.lock = threading.RLock()
+        self.gaps = 0
+        self.played = 0
+
+    def enqueue(self, *filenames):
+        with self.lock:
+            self.queue.extend(filenames)
+        self._preopen()
+
+    def clear(self):
+        """Empties the queue. The current track keeps playing."""
+        with self.lock:
+            self.queue.clear()
+            upcoming, self.next, self.next_name = self.next, None, None
+        if upcoming is not None:
+            upcoming.free()
+
+    def _preopen(self):
+        with self.lock:
+            if self.next is not None or self.loader is not None or not self.queue:
+                return
+            filename = self.queue.popleft()
+            self.loader = threading.Thread(target=self._load, args=(filename,))
+            self.loader.daemon = True
+            self.loader.start()  # before unlocking, so that play() never joins an unstarted loader
+
+    def _load(self, filename):
+        try:
+            stream = FileStream(file=filename, decode=True, flags=BASS_SAMPLE_FLOAT)
+        except BassError:
+            stream = None  # unreadable; skipped
+        with self.lock:
+            self.loader = None
+            if stream is not None:
+                self.next = stream
+                self.next_name = filename
+        if stream is None:
+            self._preopen()
+
+    def play(self):
+        """Starts the first queued track if nothing is playing. Waits for it to open."""
+        if self.current is not None:
+            return
+        self._preopen()
+        loader = self.loader
+        if loader is not None:
+            loader.join()
+        self.mixer.lock()
+        try:
+            with self.lock:
+                if self.current is None:
+                    self._advance(0, self.mixer.get_mix_frame())
+        finally:
+            self.mixer.unlock()
+
+    def skip(self, fade=0.05):
+        """Fades out the current track and starts the next one."""
+        if self.current is None:
+            return self.play()
+        self.mixer.lock()
+        try:
+            with self.lock:
+                current = self.current
+                if current is None:
+                    return  # the track ended meanwhile and nothing followed
+                for sync in list(current.syncs):
+                    self.mixer.remove_source_sync(current, sync)
+                # end for
+                fade_frames = int(self.mixer.freq * fade)
+                self.mixer.ramp(current, 0.0, fade_frames)
+                self.skipped.append((self.mixer.get_mix_frame() + fade_frames, current))
+                self.current = None
+                self._advance(0, self.mixer.get_mix_frame())
+        finally:
+            self.mixer.unlock()
+
+    def _advance(self, fade_frames, start):
+        """Starts the next track at mixer frame start, or as soon as possible if that has passed, if it's open. Called from mixtime syncs, so nothing here waits for I/O; game-thread callers must hold the mixer lock and self.lock."""
+        with self.lock:
+            stream, name = self.next, self.next_name
+            self.next = self.next_name = None
+            if stream is None:
+                self.waiting = self.loader is not None or bool(self.queue)
+                if self.waiting:
+                    self.gaps += 1
+                self.current = self.current_name = None
+                return
+            self.waiting = False
+            start = max(start, self.mixer.get_mix_frame())
+            self.mixer.add_channel(
+                stream,
+                delay=start - self.mixer.get_mix_frame(),
+                autofree=True,
+                norampin=not fade_frames)
+            if fade_frames:
+                self.mixer.set_envelope(stream, [(0, 0.0), (fade_frames, 1.0)])
+            self.current = stream
+            self.current_name = name
+            self.current_end = start + int(round(
+                stream.length_in_seconds() * self.mixer.freq))
+            self.played += 1
+            self._set_transition(stream)
+            self._preopen()
+
+    def _set_transition(self, stream):
+        length = stream.get_length()
+        fade = stream.seconds_to_bytes(self.crossfade) if self.crossfade else 0
+        if 0 < fade < length:
+            fade_frames = int(self.crossfade * self.mixer.freq)
+
+            def crossfade(sync, handle, data):
+                begin = self.current_end - fade_frames
+                self.mixer.ramp(
+                    stream, 0.0, fade_frames,
+                    delay=max(0, begin - self.mixer.get_mix_frame()), start=1.0)
+                self._advance(fade_frames, begin)
+            self.mixer.set_source_sync(
+                stream, BASS_SYNC_POS, length - fade, crossfade,
+                onetime=True, mixtime=True)
+        else:
+            self.mixer.set_source_sync(
+                stream, BASS_SYNC_END, 0,
+                lambda *args: self._advance(0, self.current_end),
+                onetime=True, mixtime=True)
+
+    def stop(self):
+        """Stops playback and empties the queue."""
+        self.clear()
+        self.mixer.lock()
+        try:
+            with self.lock:
+                for stream in list(self.mixer.sources):
+                    self.mixer.remove_channel(stream)  # frees autofree sources
+                    stream.handle = None
+                # end for
+                self.current = self.current_name = None
+                self.skipped = []
+                self.waiting = False
+        finally:
+            self.mixer.unlock()
+
+    def update(self):
+        """Releases finished tracks and resumes after a gap once the next track is open."""
+        self.mixer.lock()
+        try:
+            with self.lock:
+                for stream in self.mixer.prune():
+                    stream.handle = None  # already freed by BASS
+                # end for
+                now = self.mixer.get_mix_frame()
+                for item in [s for s in self.skipped if s[0] <= now]:
+                    self.skipped.remove(item)
+                    if item[1].handle is not None:
+                        self.mixer.remove_channel(item[1])  # frees autofree sources
+                        item[1].handle = None
+                # end for
+                if self.waiting and self.next is not None:
+                    self._advance(0, self.mixer.get_mix_frame())
+        finally:
+            self.mixer.unlock()
+
+    def get_state(self):
+        """Returns a dict describing playback and what is prepared ahead of it."""
+        state = {
+            'current': self.current_name,
+            'position': 0.0,
+            'remaining': 0.0,
+            'next': self.next_name,
+            'next_ready': self.next is not None,
+            'opening': self.loader is not None,
+            'queued': len(self.queue),
+            'buffered': self.mixer.get_buffered(),
+            'waiting': self.waiting,
+            'gaps': self.gaps,
+            'played': self.played,
+        }
+        current = self.current
+        if current is not None:
+            try:
+                position = self.mixer.get_source_position(current)
+                state['position'] = current.bytes_to_seconds(position)
+                state['remaining'] = current.bytes_to_seconds(
+                    current.get_length() - position)
+            except BassError:
+                pass
+        return state
@@ -1,9 +1,11 @@
 from __future__ import absolute_import
 from .channel import Channel
 from .external.pybass import *
-from ctypes import string_at
+import threading
+import time
 import wave
 from .main import bass_call, bass_call_0
+from .ring_buffer import RingBuffer
 
 
 class Recording(Channel):
@@ -16,7 +18,7 @@ class Recording(Channel):
             proc=None,
             user=None):
         if not proc:
-            def proc(): return True
+            def proc(*args): return True
         self.callback = RECORDPROC(proc)
         self._frequency = frequency
         self._channels = channels
@@ -35,28 +37,97 @@ class Recording(Channel):
 
 
 class WaveRecording(Recording):
+    """Records to a file without touching the disk on the BASS recording thread.
+
+    The recording callback only copies each block into a preallocated ring buffer; a writer thread drains it to the file in large sequential writes. If the writer falls behind and the ring fills up, blocks are dropped and counted in overruns and dropped_bytes instead of stalling the capture thread.
+
+    format can be 'wav', 'raw' (headerless PCM) or 'encoder', in which case encoder_command is passed to sound_lib.encoder.Encoder and BASSenc writes the file itself. format, encoder_command, buffer_length (seconds) and write_interval (seconds) are keyword-only, so the remaining positional arguments still go to Recording."""
 
     def __init__(self, filename=None, proc=None, *args, **kwargs):
-        callback = proc or self.recording_callback
+        format = kwargs.pop('format', 'wav')
+        encoder_command = kwargs.pop('encoder_command', None)
+        buffer_length = kwargs.pop('buffer_length', 2.0)
+        write_interval = kwargs.pop('write_interval', 0.25)
+        if format not in ('wav', 'raw', 'encoder'):
+            raise ValueError('unknown recording format %r' % format)
+        self.format = format
+        self.encoder_command = encoder_command
+        self.encoder = None
+        self.file = None
+        self.writer = None
+        self.writing = False
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.write_interval = write_interval
+        # frequency and channels may be passed on to Recording positionally.
+        frequency = args[0] if len(args) > 0 else kwargs.get('frequency', 44100)
+        channels = args[1] if len(args) > 1 else kwargs.get('channels', 2)
+        self.ring = RingBuffer(int(buffer_length * frequency) * channels * 2)
+        if format == 'encoder':
+            callback = proc
+        else:
+            callback = proc or self.recording_callback
         super(WaveRecording, self).__init__(proc=callback, *args, **kwargs)
         self.filename = filename
 
     def recording_callback(self, handle, buffer, length, user):
-        buf = string_at(buffer, length)
-        self.file.writeframes(buf)
+        if not self.ring.write(buffer, length):
+            self.overruns += 1
+            self.dropped_bytes += length
         return True
 
     def setup_file(self):
+        if self.format == 'encoder':
+            from .encoder import Encoder
+            self.encoder = Encoder(self, self.encoder_command)
+            return
+        if self.format == 'raw':
+            self.file = open(self.filename, 'wb')
+            return
         self.file = wave.open(self.filename, 'w')
         self.file.setnchannels(self._channels)
         self.file.setsampwidth(2)
         self.file.setframerate(self._frequency)
 
+    def _write(self, data):
+        if self.format == 'wav':
+            self.file.writeframesraw(data)
+        else:
+            self.file.write(data)
+
+    def _writer_loop(self):
+        while self.writing:
+            time.sleep(self.write_interval)
+            data = self.ring.read()
+            if data:
+                self._write(data)
+        # end while
+        data = self.ring.read()
+        if data:
+            self._write(data)
+
     def play(self, *args, **kwargs):
         if not self.is_playing:
             self.setup_file()
+            if self.encoder is not None:
+                self.encoder.paused = False
+            else:
+                self.ring.clear()
+                self.writing = True
+                self.writer = threading.Thread(target=self._writer_loop)
+                self.writer.daemon = True
+                self.writer.start()
         super(WaveRecording, self).play(*args, **kwargs)
 
     def stop(self, *args, **kwargs):
         super(WaveRecording, self).stop(*args, **kwargs)
+        if self.encoder is not None:
+            self.encoder.stop()
+            self.encoder = None
+            return
+        self.writing = False
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
         self.file.close()
+        self.file = None
@@ -0,0 +1,221 @@
+from __future__ import absolute_import
+import contextlib
+import logging
+import os
+import threading
+import time
+import traceback
+import weakref
+from .external.pybass import *
+
+log = logging.getLogger("sound_lib.registry")
+_package_directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def _creation_site():
+    """Returns "file:line" of the innermost caller outside sound_lib."""
+    for filename, line, function, text in reversed(traceback.extract_stack(limit=16)):
+        if not os.path.abspath(filename).startswith(_package_directory):
+            return '%s:%d' % (filename, line)
+    return None
+
+
+def _release_order(obj):
+    if hasattr(obj, 'remove') and not hasattr(obj, 'play'):
+        return 0  # effects, before their channels
+    if hasattr(obj, 'play'):
+        return 1  # channels and streams, before their samples
+    return 2
+
+
+class Entry(object):
+
+    def __init__(self, ref, kind, owner, site):
+        self.ref = ref
+        self.kind = kind
+        self.owner = owner
+        self.site = site
+        self.created = time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.created
+
+    def get_memory_usage(self):
+        obj = self.ref()
+        usage = getattr(obj, 'get_memory_usage', None)
+        if usage is None:
+            return 0
+        try:
+            return usage()
+        except Exception:
+            return 0
+
+
+class HandleRegistry(object):
+    """Keeps track of every live sample, stream, channel and effect object.
+
+    Objects register themselves when created and leave when freed or garbage collected; entries hold weak references, so the registry never keeps anything alive. Each entry records its kind (the class name), an owner tag and, for one object in sample_every, the line that created it, so that tracking stays cheap.
+
+    Owners give explicit lifetimes: objects created inside owned_by(tag) or scope(tag) get that tag, scope() frees them on exit, and release(tag) frees everything with a tag, e.g. when a scene ends. report() summarizes what is alive and flags stale objects: streams and channels that have stopped but were never freed."""
+
+    def __init__(self, sample_every=16, stale_age=30.0, report_interval=0.0):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.sample_every = sample_every
+        self.stale_age = stale_age
+        self.report_interval = report_interval
+        self.last_report = time.time()
+        self.enabled = True
+        self.created = 0
+        self.freed = 0
+
+    def _owner(self):
+        owners = getattr(self.local, 'owners', None)
+        return owners[-1] if owners else None
+
+    def register(self, obj, kind=None):
+        if not self.enabled:
+            return
+        self.created += 1
+        site = None
+        if self.sample_every and (self.created - 1) % self.sample_every == 0:
+            site = _creation_site()
+        key = id(obj)
+
+        def forget(ref):
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry.ref is ref:
+                    del self.entries[key]
+        entry = Entry(
+            weakref.ref(obj, forget), kind or type(obj).__name__, self._owner(), site)
+        with self.lock:
+            self.entries[key] = entry
+
+    def unregister(self, obj):
+        """Called when obj is freed explicitly."""
+        with self.lock:
+            if self.entries.pop(id(obj), None) is not None:
+                self.freed += 1
+
+    def tag(self, obj, owner):
+        """Sets the owner of an already registered object."""
+        entry = self.entries.get(id(obj))
+        if entry is not None:
+            entry.owner = owner
+
+    @contextlib.contextmanager
+    def owned_by(self, owner):
+        """Tags objects created by this thread inside the block with owner."""
+        owners = getattr(self.local, 'owners', None)
+        if owners is None:
+            owners = self.local.owners = []
+        owners.append(owner)
+        try:
+            yield
+        finally:
+            owners.pop()
+
+    @contextlib.contextmanager
+    def scope(self, owner):
+        """Like owned_by, and frees the objects tagged owner when the block ends."""
+        try:
+            with self.owned_by(owner):
+                yield
+        finally:
+            self.release(owner)
+
+    def live(self, kind=None, owner=None):
+        """Returns (object, entry) pairs of live objects, optionally filtered by kind and owner."""
+        with self.lock:
+            entries = list(self.entries.values())
+        result = []
+        for entry in entries:
+            obj = entry.ref()
+            if obj is None:
+                continue
+            if kind is not None and entry.kind != kind:
+                continue
+            if owner is not None and entry.owner != owner:
+                continue
+            result.append((obj, entry))
+        # end for
+        return result
+
+    def release(self, owner):
+        """Frees every live object tagged owner: effects first, then channels and streams, then samples. Returns how many were freed."""
+        objects = [obj for obj, entry in self.live(owner=owner)]
+        objects.sort(key=_release_order)
+        count = 0
+        for obj in objects:
+            try:
+                if _release_order(obj) == 0:
+                    obj.remove()
+                else:
+                    obj.free()
+            except Exception:
+                log.exception("could not free %r" % obj)
+            self.unregister(obj)
+            count += 1
+        # end for
+        return count
+
+    def is_stale(self, obj, entry):
+        if entry.age < self.stale_age or not hasattr(obj, 'is_active'):
+            return False
+        try:
+            return obj.handle is not None and obj.is_active() == BASS_ACTIVE_STOPPED
+        except Exception:
+            return False
+
+    def get_memory_usage(self, by='kind'):
+        """Returns a dict of estimated bytes held by live objects, keyed by kind or owner."""
+        usage = {}
+        for obj, entry in self.live():
+            key = getattr(entry, by)
+            usage[key] = usage.get(key, 0) + entry.get_memory_usage()
+        # end for
+        return usage
+
+    def get_counts(self, by='kind'):
+        counts = {}
+        for obj, entry in self.live():
+            key = getattr(entry, by)
+            counts[key] = counts.get(key, 0) + 1
+        # end for
+        return counts
+
+    def report(self):
+        """Returns a text report of live objects grouped by kind, owner and creation site (where sampled), with stale objects counted separately."""
+        groups = {}
+        for obj, entry in self.live():
+            key = (entry.kind, str(entry.owner), entry.site or '-')
+            group = groups.setdefault(key, [0, 0, 0, 0.0])
+            group[0] += 1
+            group[1] += 1 if self.is_stale(obj, entry) else 0
+            group[2] += entry.get_memory_usage()
+            group[3] = max(group[3], entry.age)
+        # end for
+        lines = ["%d live objects (%d created, %d freed explicitly)" % (
+            sum(g[0] for g in groups.values()), self.created, self.freed)]
+        for (kind, owner, site), (count, stale, size, age) in sorted(
+                groups.items(), key=lambda item: -item[1][0]):
+            lines.append("%s owner=%s site=%s: %d live, %d stale, %d bytes, oldest %.0fs" % (
+                kind, owner, site, count, stale, size, age))
+        # end for
+        return "\n".join(lines)
+
+    def update(self, logger=None):
+        """Logs a report to logger (sound_lib.registry by default) every report_interval seconds; 0 disables it. Cheap to call every frame."""
+        if not self.report_interval:
+            return
+        now = time.time()
+        if now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+        (logger or log).info(self.report())
+
+
+registry = HandleRegistry()
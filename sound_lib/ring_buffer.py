@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+from ctypes import addressof, c_char, memmove, string_at
+from .main import address_of, buffer_size
+
+
+class RingBuffer(object):
+    """A preallocated byte ring buffer for one producer thread and one consumer thread.
+
+    The producer only advances write_position and the consumer only advances read_position, so no lock is taken on either side. This makes it safe to write from a BASS callback while another thread reads."""
+
+    def __init__(self, size):
+        self.size = size
+        self.buffer = (c_char * size)()
+        self.address = addressof(self.buffer)
+        self.read_position = 0
+        self.write_position = 0
+
+    @property
+    def used(self):
+        """Number of bytes waiting to be read."""
+        return self.write_position - self.read_position
+
+    @property
+    def free(self):
+        """Number of bytes that can be written without overrunning."""
+        return self.size - self.used
+
+    def write(self, data, length=None):
+        """Copies length bytes from data (an address, ctypes object or buffer) into the ring. Returns False without writing anything if there is not enough room."""
+        if length is None:
+            length = buffer_size(data)
+        if length > self.free:
+            return False
+        source = address_of(data)
+        start = self.write_position % self.size
+        first = min(length, self.size - start)
+        memmove(self.address + start, source, first)
+        if first < length:
+            memmove(self.address, source + first, length - first)
+        self.write_position += length
+        return True
+
+    def read_into(self, data, length=None):
+        """Copies up to length bytes into data (an address, ctypes object or buffer) and returns the number of bytes copied."""
+        if length is None:
+            length = buffer_size(data)
+        length = min(length, self.used)
+        if length <= 0:
+            return 0
+        dest = address_of(data)
+        start = self.read_position % self.size
+        first = min(length, self.size - start)
+        memmove(dest, self.address + start, first)
+        if first < length:
+            memmove(dest + first, self.address, length - first)
+        self.read_position += length
+        return length
+
+    def read(self, length=None):
+        """Reads up to length bytes (everything available by default) and returns them as bytes."""
+        if length is None:
+            length = self.used
+        length = min(length, self.used)
+        if length <= 0:
+            return b''
+        start = self.read_position % self.size
+        first = min(length, self.size - start)
+        res = string_at(self.address + start, first)
+        if first < length:
+            res += string_at(self.address, length - first)
+        self.read_position += length
+        return res
+
+    def clear(self):
+        """Discards all unread data. Must be called from the consumer side."""
+        self.read_position = self.write_position
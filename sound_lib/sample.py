@@ -2,8 +2,10 @@ from __future__ import absolute_import
 import platform
 import sys
 from .channel import Channel
-from .main import bass_call, bass_call_0, FlagObject
+from .main import bass_call, bass_call_0, FlagObject, address_of, buffer_size
+from .registry import registry
 from .external.pybass import *
+from ctypes import pointer
 
 try:
     convert_to_unicode = unicode
@@ -11,6 +13,13 @@ except NameError:
     convert_to_unicode = str
 
 
+SAMPLE_FORMATS = {
+    'h': 0,
+    'f': BASS_SAMPLE_FLOAT,
+    'B': BASS_SAMPLE_8BITS,
+}
+
+
 class Sample(FlagObject):
     def __init__(self, file, flags=0, unicode=True):
         if platform.system() == 'Darwin':
@@ -22,15 +31,110 @@ class Sample(FlagObject):
         self.setup_flag_mapping()
         flags = flags | self.flags_for(unicode=unicode)
         self.handle = bass_call(BASS_SampleLoad, False, file, 0, 0, 128, flags)
+        registry.register(self)
+
+    @classmethod
+    def from_buffer(
+            cls,
+            data,
+            freq,
+            chans=1,
+            sample_format='h',
+            max=16,
+            flags=0,
+            loop=False,
+            three_d=False,
+            software=False):
+        """Creates a sample from interleaved PCM in memory: bytes or any buffer-protocol object. sample_format is 'h' (16-bit), 'f' (32-bit float) or 'B' (8-bit unsigned). max is the number of simultaneous playbacks; when exceeded, the one furthest along is restarted. The data is copied into BASS, so the buffer can be reused afterwards."""
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError('unsupported sample format %r' % sample_format)
+        sample = cls.__new__(cls)
+        sample.file = None
+        sample.setup_flag_mapping()
+        flags = flags | SAMPLE_FORMATS[sample_format] | BASS_SAMPLE_OVER_POS | sample.flags_for(
+            loop=loop, three_d=three_d, software=software)
+        sample.handle = None
+        sample.handle = bass_call(
+            BASS_SampleCreate,
+            buffer_size(data),
+            freq,
+            chans,
+            max,
+            flags)
+        registry.register(sample)
+        sample.set_data(data)
+        return sample
+
+    @classmethod
+    def from_array(cls, array, freq, **kwargs):
+        """Creates a sample from a NumPy array of shape (frames,) or (frames, channels). int16, float32 and uint8 arrays are used as is; other float arrays are converted to float32. Other keyword arguments are passed to from_buffer."""
+        import numpy
+        array = numpy.asarray(array)
+        if array.dtype.kind == 'f' and array.dtype != numpy.float32:
+            array = array.astype(numpy.float32)
+        chans = 1 if array.ndim == 1 else array.shape[1]
+        return cls.from_buffer(
+            numpy.ascontiguousarray(array),
+            freq,
+            chans=chans,
+            sample_format=array.dtype.char,
+            **kwargs)
+
+    def get_info(self):
+        """Returns the sample's BASS_SAMPLE info (freq, chans, length in bytes, flags, max...)."""
+        info = BASS_SAMPLE()
+        bass_call(BASS_SampleGetInfo, self.handle, pointer(info))
+        return info
+
+    @property
+    def sample_format(self):
+        flags = self.get_info().flags
+        if flags & BASS_SAMPLE_FLOAT:
+            return 'f'
+        if flags & BASS_SAMPLE_8BITS:
+            return 'B'
+        return 'h'
+
+    def set_data(self, data):
+        """Replaces the sample data. data must hold exactly the sample's length in bytes."""
+        if buffer_size(data) != self.get_info().length:
+            raise ValueError('data must be %d bytes' % self.get_info().length)
+        bass_call(BASS_SampleSetData, self.handle, address_of(data))
+
+    def get_data_into(self, buffer):
+        """Copies the sample data into a caller-owned buffer of at least the sample's length in bytes."""
+        if buffer_size(buffer) < self.get_info().length:
+            raise ValueError('buffer too small')
+        bass_call(BASS_SampleGetData, self.handle, address_of(buffer))
+        return buffer
+
+    def get_data(self):
+        """Returns the sample data as bytes."""
+        buf = bytearray(self.get_info().length)
+        self.get_data_into(buf)
+        return bytes(buf)
+
+    def to_array(self):
+        """Returns the sample data as a NumPy array of shape (frames, channels) in the sample's format."""
+        import numpy
+        info = self.get_info()
+        array = numpy.empty(info.length // numpy.dtype(self.sample_format).itemsize,
+                            dtype=self.sample_format)
+        self.get_data_into(array)
+        return array.reshape(-1, info.chans)
 
     def __del__(self):
         if self.handle:
             self.free()
 
     def free(self):
+        registry.unregister(self)
         bass_call(BASS_SampleFree, self.handle)
         self.handle = None
 
+    def get_memory_usage(self):
+        return self.get_info().length if self.handle else 0
+
     def setup_flag_mapping(self):
         super(Sample, self).setup_flag_mapping()
         self.flag_mapping.update({
@@ -44,5 +148,7 @@ class SampleBasedChannel(Channel):
         handle = bass_call(BASS_SampleGetChannel, hsample.handle, False)
         super(SampleBasedChannel, self).__init__(handle)
 
-    def __free__(self):
-        pass  # Sample-based channels don't have to be explicitly freed; BASS does that
+    def free(self):
+        """Forgets the channel. Sample-based channels don't have to be explicitly freed; BASS does that when the sample is freed or the channel is reused."""
+        registry.unregister(self)
+        self.handle = None
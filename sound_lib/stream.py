@@ -1,9 +1,13 @@
 from __future__ import absolute_import
 import platform
 import sys
+import threading
+import time
 from .channel import Channel
-from .main import bass_call, bass_call_0
+from .main import bass_call, bass_call_0, address_of, buffer_size
 from .external.pybass import *
+from .registry import registry
+from .ring_buffer import RingBuffer
 try:
     convert_to_unicode = unicode
 except NameError:
@@ -18,7 +22,10 @@ class BaseStream(Channel):
         return 0
 
     def free(self):
-        return bass_call(BASS_StreamFree, self.handle)
+        registry.unregister(self)
+        res = bass_call(BASS_StreamFree, self.handle)
+        self.handle = None
+        return res
 
     def get_file_position(self, mode):
         return bass_call_0(BASS_StreamGetFilePosition, self.handle, mode)
@@ -71,9 +78,10 @@ class FileStream(BaseStream):
             decode=False,
             unicode=True):
         """Creates a sample stream from an MP3, MP2, MP1, OGG, WAV, AIFF or plugin supported file."""
-        if platform.system() == 'Darwin':
+        if platform.system() != 'Windows':  # BASS takes UTF-8 paths elsewhere
             unicode = False
-            file = file.encode(sys.getfilesystemencoding())
+            if isinstance(file, str):
+                file = file.encode(sys.getfilesystemencoding())
         self.setup_flag_mapping()
         flags = flags | self.flags_for(
             three_d=three_d,
@@ -84,6 +92,7 @@ class FileStream(BaseStream):
         if unicode and isinstance(file, str):
             file = convert_to_unicode(file)
         self.file = file
+        self.mem = mem
 
         handle = bass_call(
             BASS_StreamCreateFile,
@@ -94,6 +103,10 @@ class FileStream(BaseStream):
             flags)
         super(FileStream, self).__init__(handle)
 
+    def get_memory_usage(self):
+        """Returns the size of the file data held in memory for streams created with mem=True."""
+        return len(self.file) if self.mem else 0
+
 
 class URLStream(BaseStream):
 
@@ -152,4 +165,146 @@ class PushStream(BaseStream):
         super(PushStream, self).__init__(handle)
 
     def push(self, data):
-        return bass_call_0(BASS_StreamPutData, self.handle, data, len(data))
+        """Queues sample data. Accepts bytes or any C-contiguous buffer-protocol object (NumPy array, bytearray, memoryview); the data is passed to BASS without an intermediate copy."""
+        return bass_call_0(
+            BASS_StreamPutData,
+            self.handle,
+            address_of(data),
+            buffer_size(data))
+
+    def get_queued(self):
+        """Returns the number of bytes queued and not yet played."""
+        return bass_call_0(BASS_StreamPutData, self.handle, None, 0)
+
+    def end(self):
+        """Tells BASS that no more data will be pushed; the stream ends when the queue runs out."""
+        return bass_call_0(
+            BASS_StreamPutData,
+            self.handle,
+            None,
+            BASS_STREAMPROC_END)
+
+
+class DecoupledStream(PushStream):
+    """A PushStream fed from Python threads so that no Python code runs on BASS's mixing thread.
+
+    A producer thread calls producer(frames) to render audio ahead of time into a lock-free ring buffer (ring_length seconds). A feeder thread keeps lookahead seconds queued in the stream, taking data from the ring. If the ring runs dry, silence is pushed instead and counted in underruns/silence_bytes, so the stream never stalls. producer returns a buffer-protocol object (bytes, NumPy array...) of at most frames frames, or None when it has nothing more to play. Without a producer, call write() from a single thread of your choice.
+
+    float selects 32-bit float samples instead of 16-bit."""
+
+    def __init__(
+            self,
+            producer=None,
+            freq=44100,
+            chans=2,
+            float=False,
+            lookahead=0.1,
+            block_length=0.02,
+            ring_length=0.5,
+            flags=0,
+            three_d=False,
+            autofree=False):
+        if float:
+            flags |= BASS_SAMPLE_FLOAT
+        super(DecoupledStream, self).__init__(
+            freq=freq,
+            chans=chans,
+            flags=flags,
+            three_d=three_d,
+            autofree=autofree)
+        self.producer = producer
+        self.frame_size = chans * (4 if float else 2)
+        self.block_time = block_length
+        self.block_frames = max(1, int(freq * block_length))
+        self.lookahead = int(lookahead * freq) * self.frame_size
+        self.ring = RingBuffer(
+            max(int(ring_length * freq), self.block_frames * 2) * self.frame_size)
+        self.silence = b'\0' * (self.block_frames * self.frame_size)
+        self.underruns = 0
+        self.silence_bytes = 0
+        self.stalls = 0
+        self.producer_finished = False
+        self.running = False
+        self.threads = []
+
+    def write(self, data):
+        """Puts rendered data into the ring buffer. Returns False if there is not enough room. Only one thread may write."""
+        return self.ring.write(data)
+
+    def start(self):
+        """Starts the worker threads and playback."""
+        if self.running:
+            return
+        self.running = True
+        self.threads = [threading.Thread(target=self._feed)]
+        if self.producer is not None:
+            self.threads.append(threading.Thread(target=self._produce))
+        for t in self.threads:
+            t.daemon = True
+            t.start()
+        # Prime the queue so that playback doesn't start with an underrun.
+        deadline = time.time() + 1.0
+        while self.get_queued() < self.lookahead // 2 and time.time() < deadline:
+            time.sleep(0.001)
+        self.play()
+
+    def stop(self):
+        """Stops playback and the worker threads."""
+        self.running = False
+        for t in self.threads:
+            t.join()
+        self.threads = []
+        super(DecoupledStream, self).stop()
+
+    def _produce(self):
+        block_bytes = self.block_frames * self.frame_size
+        while self.running and not self.producer_finished:
+            if self.ring.free < block_bytes:
+                time.sleep(self.block_time / 2.0)
+                continue
+            data = self.producer(self.block_frames)
+            if data is None:
+                self.producer_finished = True
+                break
+            while self.running and not self.ring.write(data):
+                time.sleep(self.block_time / 2.0)
+            # end while
+        # end while
+
+    def _feed(self):
+        interval = self.block_time / 2.0
+        was_stalled = False
+        while self.running:
+            queued = self.get_queued()
+            if queued < self.lookahead:
+                # BASS only accepts whole frames.
+                want = min(self.lookahead - queued, self.ring.used)
+                data = self.ring.read(want - want % self.frame_size)
+                if data:
+                    self.push(data)
+                elif self.producer_finished:
+                    # The last block may have been written after ring.used
+                    # was read above; only end once it has been pushed too.
+                    if self.ring.used >= self.frame_size:
+                        continue
+                    self.end()
+                    break
+                elif queued < self.lookahead // 2:
+                    self.underruns += 1
+                    self.silence_bytes += len(self.silence)
+                    self.push(self.silence)
+            stalled = self.is_stalled
+            if stalled and not was_stalled:
+                self.stalls += 1
+            was_stalled = stalled
+            time.sleep(interval)
+        # end while
+
+    def get_stats(self):
+        return {
+            'queued': self.get_queued(),
+            'buffered': self.ring.used,
+            'underruns': self.underruns,
+            'silence_bytes': self.silence_bytes,
+            'stalls': self.stalls,
+        }
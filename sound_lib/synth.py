@@ -0,0 +1,414 @@
+from __future__ import absolute_import
+import ctypes
+import math
+import numpy
+from .external.pybass import *
+from .stream import Stream
+
+WAVEFORMS = ('sine', 'square', 'saw', 'triangle')
+
+
+class Context(object):
+    """Shared rendering state of one graph: the sample rate and the number of the block being rendered."""
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.block = 0
+
+
+def as_node(value):
+    if isinstance(value, Node):
+        return value
+    return Constant(value)
+
+
+class Node(object):
+    """Base class of synthesis nodes. A node renders mono float blocks on demand.
+
+    Parameters changed with set() are applied at the start of the next block, so they can be changed from the game thread while the stream is playing. A node used by several other nodes is rendered only once per block."""
+
+    finished = False
+
+    def __init__(self):
+        self._pending = {}
+        self._block = None
+        self._output = None
+
+    def set(self, **params):
+        """Changes parameters at the next block boundary."""
+        self._pending = dict(self._pending, **params)
+
+    def _apply_pending(self):
+        pending, self._pending = self._pending, {}
+        for k, v in pending.items():
+            if not hasattr(self, k):
+                raise AttributeError('%s has no parameter %r' %
+                                     (self.__class__.__name__, k))
+            setattr(self, k, v)
+
+    def render(self, ctx, frames):
+        if self._block != ctx.block:
+            if self._pending:
+                self._apply_pending()
+            self._output = self.process(ctx, frames)
+            self._block = ctx.block
+        return self._output
+
+    def process(self, ctx, frames):
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return Mix(self, other)
+
+    __radd__ = __add__
+
+    def __mul__(self, other):
+        return Multiply(self, other)
+
+    __rmul__ = __mul__
+
+
+class Constant(Node):
+
+    def __init__(self, value):
+        super(Constant, self).__init__()
+        self.value = value
+
+    def process(self, ctx, frames):
+        return numpy.full(frames, self.value, dtype=numpy.float64)
+
+
+class Oscillator(Node):
+    """A band-unlimited oscillator. frequency and amplitude may be numbers or nodes (for vibrato, FM or tremolo)."""
+
+    def __init__(self, frequency=440.0, waveform='sine', amplitude=1.0):
+        super(Oscillator, self).__init__()
+        if waveform not in WAVEFORMS:
+            raise ValueError('unknown waveform %r' % waveform)
+        self.frequency = frequency
+        self.waveform = waveform
+        self.amplitude = amplitude
+        self.phase = 0.0
+
+    def process(self, ctx, frames):
+        if isinstance(self.frequency, Node):
+            inc = self.frequency.render(ctx, frames) / ctx.sample_rate
+            phases = self.phase + numpy.cumsum(inc) - inc
+            self.phase = (phases[-1] + inc[-1]) % 1.0
+        else:
+            inc = float(self.frequency) / ctx.sample_rate
+            phases = self.phase + numpy.arange(frames) * inc
+            self.phase = (self.phase + frames * inc) % 1.0
+        phases %= 1.0
+        if self.waveform == 'sine':
+            out = numpy.sin(2 * math.pi * phases)
+        elif self.waveform == 'square':
+            out = numpy.where(phases < 0.5, 1.0, -1.0)
+        elif self.waveform == 'saw':
+            out = 2.0 * phases - 1.0
+        else:
+            out = 1.0 - 4.0 * numpy.abs(phases - 0.5)
+        if isinstance(self.amplitude, Node):
+            return out * self.amplitude.render(ctx, frames)
+        return out * self.amplitude
+
+
+class Noise(Node):
+
+    def __init__(self, amplitude=1.0, seed=None):
+        super(Noise, self).__init__()
+        self.amplitude = amplitude
+        self.random = numpy.random.default_rng(seed)
+
+    def process(self, ctx, frames):
+        return self.random.uniform(-1.0, 1.0, frames) * self.amplitude
+
+
+class Envelope(Node):
+    """A linear ADSR envelope. Call trigger() to start it and release() to enter the release stage. If source is given, the envelope is applied to it; otherwise the envelope itself is output. finished becomes True when the release stage ends.
+
+    attack, decay and release are the durations of their stages in seconds, whatever level a stage starts from."""
+
+    def __init__(
+            self,
+            source=None,
+            attack=0.01,
+            decay=0.1,
+            sustain=0.7,
+            release=0.2):
+        super(Envelope, self).__init__()
+        self.source = source
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release_time = release
+        self.state = 'idle'
+        self.level = 0.0
+        self.triggered = False
+        self.entered = 'idle'
+        self.entry_level = 0.0
+
+    @property
+    def finished(self):
+        return self.triggered and self.state == 'idle'
+
+    def trigger(self):
+        self.set(state='attack')
+
+    def release(self):
+        self.set(state='release')
+
+    def _segment(self, out, pos, frames, target, duration, sr):
+        """Ramps level toward target; returns the number of samples written and whether the target was reached."""
+        if duration <= 0:
+            self.level = target
+            return 0, True
+        rate = 1.0 / (duration * sr)
+        if target < self.level:
+            rate = -rate
+        needed = int(math.ceil((target - self.level) / rate))
+        n = min(frames - pos, max(needed, 0))
+        out[pos:pos + n] = self.level + rate * numpy.arange(1, n + 1)
+        if n == needed:
+            self.level = target
+            if n:
+                out[pos + n - 1] = target
+            return n, True
+        self.level = out[pos + n - 1]
+        return n, False
+
+    def _full_scale(self, duration, target):
+        """Converts the duration of the current stage into the duration of a full-scale ramp, as _segment expects."""
+        distance = abs(target - self.entry_level)
+        return duration / distance if distance else 0
+
+    def process(self, ctx, frames):
+        out = numpy.empty(frames, dtype=numpy.float64)
+        sr = ctx.sample_rate
+        pos = 0
+        while pos < frames:
+            if self.state != self.entered:
+                self.entered = self.state
+                self.entry_level = self.level
+            if self.state == 'attack':
+                self.triggered = True
+                n, done = self._segment(
+                    out, pos, frames, 1.0, self._full_scale(self.attack, 1.0), sr)
+                if done:
+                    self.state = 'decay'
+            elif self.state == 'decay':
+                n, done = self._segment(
+                    out, pos, frames, self.sustain, self._full_scale(
+                        self.decay, self.sustain), sr)
+                if done:
+                    self.state = 'sustain' if self.sustain > 0 else 'idle'
+            elif self.state == 'release':
+                n, done = self._segment(
+                    out, pos, frames, 0.0, self._full_scale(
+                        self.release_time, 0.0), sr)
+                if done:
+                    self.state = 'idle'
+            else:  # idle or sustain hold their level
+                out[pos:] = self.level
+                n = frames - pos
+            pos += n
+        # end while
+        if self.source is not None:
+            return out * self.source.render(ctx, frames)
+        return out
+
+
+def _one_pole(x, a, y):
+    """y[n] = y[n-1] + a * (x[n] - y[n-1]), evaluated in closed form on short chunks so that the powers of (1 - a) stay representable."""
+    out = numpy.empty_like(x)
+    b = 1.0 - a
+    chunk = 32
+    for start in range(0, len(x), chunk):
+        seg = x[start:start + chunk]
+        n = len(seg)
+        powers = b ** numpy.arange(1, n + 1)
+        if b == 0.0:
+            res = seg.copy()
+        else:
+            res = powers * (y + numpy.cumsum(a * seg / powers))
+        out[start:start + n] = res
+        y = res[-1]
+    # end for
+    return out, y
+
+
+class LowPass(Node):
+    """One-pole low-pass filter. cutoff is in Hz."""
+
+    def __init__(self, source, cutoff=1000.0):
+        super(LowPass, self).__init__()
+        self.source = source
+        self.cutoff = cutoff
+        self.y = 0.0
+
+    def coefficient(self, sr):
+        return 1.0 - math.exp(-2 * math.pi * min(self.cutoff, sr / 2) / sr)
+
+    def process(self, ctx, frames):
+        x = self.source.render(ctx, frames)
+        out, self.y = _one_pole(x, self.coefficient(ctx.sample_rate), self.y)
+        return out
+
+
+class HighPass(LowPass):
+    """One-pole high-pass filter. cutoff is in Hz."""
+
+    def process(self, ctx, frames):
+        x = self.source.render(ctx, frames)
+        low, self.y = _one_pole(x, self.coefficient(ctx.sample_rate), self.y)
+        return x - low
+
+
+class Mix(Node):
+
+    def __init__(self, *sources):
+        super(Mix, self).__init__()
+        self.sources = [as_node(s) for s in sources]
+
+    @property
+    def finished(self):
+        return all(s.finished for s in self.sources if not isinstance(s, Constant))
+
+    def process(self, ctx, frames):
+        out = numpy.zeros(frames, dtype=numpy.float64)
+        for s in self.sources:
+            out += s.render(ctx, frames)
+        return out
+
+
+class Multiply(Mix):
+
+    @property
+    def finished(self):
+        return any(s.finished for s in self.sources)
+
+    def process(self, ctx, frames):
+        out = numpy.ones(frames, dtype=numpy.float64)
+        for s in self.sources:
+            out *= s.render(ctx, frames)
+        return out
+
+
+class FromGenerator(Node):
+    """Wraps a Python generator that yields blocks (any iterable of samples, of any length). The blocks are re-cut to the size BASS asks for. finished becomes True when the generator is exhausted and its output has been played."""
+
+    def __init__(self, generator):
+        super(FromGenerator, self).__init__()
+        self.generator = generator
+        self.pending = numpy.zeros(0, dtype=numpy.float64)
+        self.exhausted = False
+
+    @property
+    def finished(self):
+        return self.exhausted and len(self.pending) == 0
+
+    def process(self, ctx, frames):
+        parts = [self.pending]
+        have = len(self.pending)
+        while have < frames and not self.exhausted:
+            try:
+                block = numpy.asarray(next(self.generator), dtype=numpy.float64)
+            except StopIteration:
+                self.exhausted = True
+                break
+            parts.append(block)
+            have += len(block)
+        # end while
+        data = numpy.concatenate(parts)
+        out = numpy.zeros(frames, dtype=numpy.float64)
+        n = min(frames, len(data))
+        out[:n] = data[:n]
+        self.pending = data[n:]
+        return out
+
+
+class SynthStream(Stream):
+    """Plays a synthesis graph through a user stream. BASS asks for float data on its mixing thread; each request is rendered as one NumPy block. When the graph reports finished, the stream ends.
+
+    pan (-1 to 1) is applied when chans is 2."""
+
+    def __init__(
+            self,
+            graph,
+            freq=44100,
+            chans=1,
+            pan=0.0,
+            flags=0,
+            three_d=False,
+            autofree=False,
+            decode=False):
+        self.graph = graph
+        self.pan = pan
+        self.context = Context(freq)
+        self._chans = chans
+        super(SynthStream, self).__init__(
+            freq=freq,
+            chans=chans,
+            flags=flags | BASS_SAMPLE_FLOAT,
+            proc=self._render,
+            three_d=three_d,
+            autofree=autofree,
+            decode=decode)
+
+    def _render(self, handle, buffer, length, user):
+        frames = length // (4 * self._chans)
+        self.context.block += 1
+        block = self.graph.render(self.context, frames)
+        if self._chans == 2:
+            left = math.sqrt(0.5 * (1.0 - self.pan))
+            right = math.sqrt(0.5 * (1.0 + self.pan))
+            data = numpy.empty((frames, 2), dtype=numpy.float32)
+            data[:, 0] = block * left
+            data[:, 1] = block * right
+        else:
+            data = numpy.repeat(block, self._chans).astype(numpy.float32)
+        ctypes.memmove(buffer, data.ctypes.data, frames * 4 * self._chans)
+        written = frames * 4 * self._chans
+        if self.graph.finished:
+            written |= BASS_STREAMPROC_END
+        return written
+
+
+def sonar_ping(frequency=1200.0, length=0.8):
+    """A decaying sine ping with a short attack."""
+    env = Envelope(
+        Oscillator(frequency),
+        attack=0.005,
+        decay=length,
+        sustain=0.0,
+        release=0.0)
+    env.trigger()
+    return env
+
+
+def engine_hum(frequency=55.0, roughness=0.3):
+    """A low saw and square mix with filtered noise. Change the pitch while playing with hum.set_frequency(value)."""
+    base = Oscillator(frequency, 'saw', 0.5)
+    sub = Oscillator(frequency / 2, 'square', 0.25)
+    noise = LowPass(Noise(roughness), cutoff=frequency * 4)
+    hum = LowPass(Mix(base, sub, noise), cutoff=frequency * 8)
+
+    def set_frequency(value):
+        base.set(frequency=value)
+        sub.set(frequency=value / 2)
+        noise.set(cutoff=value * 4)
+        hum.set(cutoff=value * 8)
+    hum.set_frequency = set_frequency
+    return hum
+
+
+def ui_tone(frequency=880.0, length=0.08, waveform='triangle'):
+    """A short blip for menu and UI feedback."""
+    env = Envelope(
+        Oscillator(frequency, waveform, 0.5),
+        attack=0.003,
+        decay=length,
+        sustain=0.0,
+        release=0.0)
+    env.trigger()
+    return env
@@ -0,0 +1,130 @@
+from __future__ import absolute_import
+import threading
+from .external.pybass import *
+from .main import BassError
+from .stream import FileStream
+
+
+class Timeline(object):
+    """Schedules sound starts, stops and attribute changes in audio time on a Mixer.
+
+    Times are in seconds from the timeline's zero, set by start(), and map to exact frames of the mixer output. Starts use the mixer's per-source start delay; stops and attribute changes run from one-time mixtime position syncs on the mixer. Nothing waits for the game loop, so events land on their sample as long as they are scheduled before the mixer has processed that point. Late events happen as soon as possible and are counted in get_stats()."""
+
+    def __init__(self, mixer):
+        self.mixer = mixer
+        self.origin = None
+        self.pending = {}
+        self.stopped = []
+        self.lock = threading.Lock()
+        self.scheduled = 0
+        self.late = 0
+
+    def start(self, lead=0.05):
+        """Puts the timeline's zero lead seconds after the current mix position."""
+        self.origin = self.mixer.get_mix_frame() + int(lead * self.mixer.freq)
+
+    def now(self):
+        """Returns the timeline time the mixer has processed up to."""
+        if self.origin is None:
+            self.start()
+        return (self.mixer.get_mix_frame() - self.origin) / float(self.mixer.freq)
+
+    def frame_at(self, time):
+        if self.origin is None:
+            self.start()
+        return self.origin + int(round(time * self.mixer.freq))
+
+    def play(self, sound, at, volume=None, pan=None):
+        """Starts sound, a decoding channel or a filename, at time at. The channel is freed when it ends. Returns it."""
+        if not hasattr(sound, 'handle'):
+            sound = FileStream(file=sound, decode=True)
+        if volume is not None:
+            sound.set_volume(volume)
+        if pan is not None:
+            sound.set_pan(pan)
+        frame = self.frame_at(at)
+        self.mixer.lock()
+        try:
+            delay = frame - self.mixer.get_mix_frame()
+            if delay < 0:
+                self.late += 1
+                delay = 0
+            self.mixer.add_channel(sound, delay=delay, autofree=True)
+        finally:
+            self.mixer.unlock()
+        self.scheduled += 1
+        return sound
+
+    def stop(self, channel, at):
+        """Stops a channel started with play() at time at."""
+        def stop():
+            self.mixer.pause_channel(channel)
+            self.stopped.append(channel)
+        return self.call(stop, at)
+
+    def set_attribute(self, channel, attribute, value, at):
+        """Sets an attribute ('volume', 'pan', 'frequency' or a BASS_ATTRIB_* value) of channel at time at."""
+        return self.call(lambda: channel.set_attribute(attribute, value), at)
+
+    def call(self, func, at):
+        """Calls func() when the mixer reaches time at. It runs on the mixing thread and must be quick; BASS errors from it are ignored. Returns an id for cancel()."""
+        frame = self.frame_at(at)
+
+        def fire(sync, channel, data):
+            with self.lock:
+                self.pending.pop(sync, None)
+            try:
+                func()
+            except BassError:
+                pass  # e.g. the channel already ended
+        self.scheduled += 1
+        self.mixer.lock()
+        try:
+            if frame <= self.mixer.get_mix_frame():
+                self.late += 1
+                fire(None, None, None)
+                return None
+            with self.lock:
+                sync = self.mixer.set_sync(
+                    BASS_SYNC_POS,
+                    frame * self.mixer.frame_size,
+                    fire,
+                    onetime=True,
+                    mixtime=True)
+                self.pending[sync] = func
+        finally:
+            self.mixer.unlock()
+        return sync
+
+    def cancel(self, sync=None):
+        """Cancels one pending event, or all of them. Sounds already added with play() are not affected; stop them with stop()."""
+        with self.lock:
+            syncs = list(self.pending) if sync is None else [sync]
+            syncs = [s for s in syncs if self.pending.pop(s, None) is not None]
+        # Not under self.lock: removing waits for a sync that is firing.
+        for s in syncs:
+            try:
+                self.mixer.remove_sync(s)
+            except BassError:
+                pass  # it fired meanwhile
+        # end for
+
+    def update(self):
+        """Frees sounds that were stopped and releases those that ended. Call it now and then, e.g. every frame."""
+        while self.stopped:
+            channel = self.stopped.pop()
+            if channel in self.mixer.sources:
+                self.mixer.remove_channel(channel)  # frees autofree sources
+                channel.handle = None
+        # end while
+        for channel in self.mixer.prune():
+            channel.handle = None  # already freed by BASS
+        # end for
+
+    def get_stats(self):
+        return {
+            'scheduled': self.scheduled,
+            'late': self.late,
+            'pending': len(self.pending),
+            'sources': len(self.mixer.sources),
+        }
@@ -0,0 +1,152 @@
+from __future__ import absolute_import
+import random
+import time
+import numpy
+from .external.pybass import *
+from .main import bass_call_0, BassError
+from .sample import Sample
+from .stream import FileStream
+from .effects.tempo import Tempo
+
+
+def render_variant(filename, pitch=0.0, tempo=0.0):
+    """Decodes a file through a decoding Tempo stream and returns (float32 data, freq, chans). pitch is in semitones and tempo in percent, both 0 for the original."""
+    source = FileStream(file=filename, decode=True, flags=BASS_SAMPLE_FLOAT)
+    t = Tempo(source, decode=True, free_source=True)
+    try:
+        info = t.get_info()
+        t.tempo = tempo
+        t.tempo_pitch = pitch
+        chunks = []
+        block = numpy.empty(info.freq * info.chans // 4, dtype=numpy.float32)
+        while True:
+            try:
+                got = t.get_data_into(block)
+            except BassError:  # BASS_ERROR_ENDED
+                break
+            chunks.append(block[:got // 4].copy())
+            if got < block.nbytes:  # a short read is the last one
+                break
+        # end while
+    finally:
+        t.free()
+    data = numpy.concatenate(chunks) if chunks else numpy.zeros(
+        info.chans, dtype=numpy.float32)
+    return data, info.freq, info.chans
+
+
+class Variant(object):
+
+    def __init__(self, pitch, tempo):
+        self.pitch = pitch
+        self.tempo = tempo
+        self.sample = None
+        self.size = 0
+        self.uses = 0
+        self.last_used = 0.0
+
+
+class VariantCache(object):
+    """Pre-renders pitch/tempo variations of one-shot sounds into in-memory Samples.
+
+    For each file, count variants are spread evenly over pitch_range (semitones) and tempo_range (percent). A variant is rendered with a decoding Tempo stream the first time it is picked (or by preload()), and later plays just start a sample channel. When the rendered data exceeds max_bytes, the least used variants that aren't playing are freed; they are rendered again if picked later."""
+
+    def __init__(
+            self,
+            count=4,
+            pitch_range=(-1.5, 1.5),
+            tempo_range=(-8.0, 8.0),
+            max_bytes=32 * 1024 * 1024):
+        self.count = count
+        self.pitch_range = pitch_range
+        self.tempo_range = tempo_range
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.variants = {}
+        self.last_pick = {}
+        self.renders = 0
+        self.evictions = 0
+
+    def _variants_for(self, filename):
+        variants = self.variants.get(filename)
+        if variants is None:
+            variants = []
+            for i in range(self.count):
+                f = i / float(self.count - 1) if self.count > 1 else 0.5
+                pitch = self.pitch_range[0] + (self.pitch_range[1] - self.pitch_range[0]) * f
+                # Rotate tempo against pitch so variants differ in both.
+                g = ((i + self.count // 2) % self.count) / float(self.count - 1) if self.count > 1 else 0.5
+                tempo = self.tempo_range[0] + (self.tempo_range[1] - self.tempo_range[0]) * g
+                variants.append(Variant(pitch, tempo))
+            self.variants[filename] = variants
+        return variants
+
+    def _render(self, filename, variant):
+        data, freq, chans = render_variant(filename, variant.pitch, variant.tempo)
+        variant.sample = Sample.from_array(data.reshape(-1, chans), freq)
+        variant.size = data.nbytes
+        self.total_bytes += variant.size
+        self.renders += 1
+        self._evict(keep=variant)
+
+    def _evict(self, keep):
+        if self.total_bytes <= self.max_bytes:
+            return
+        candidates = [v for vs in self.variants.values() for v in vs
+                      if v.sample is not None and v is not keep]
+        candidates.sort(key=lambda v: (v.uses, v.last_used))
+        for v in candidates:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if bass_call_0(BASS_SampleGetChannels, v.sample.handle, None) > 0:
+                continue  # still playing
+            v.sample.free()
+            v.sample = None
+            self.total_bytes -= v.size
+            v.size = 0
+            self.evictions += 1
+        # end for
+
+    def preload(self, filename):
+        """Renders every variant of filename now, e.g. while a level loads."""
+        for v in self._variants_for(filename):
+            if v.sample is None:
+                self._render(filename, v)
+        # end for
+
+    def pick(self, filename):
+        """Returns the Sample of a random variant of filename, never the same one twice in a row."""
+        variants = self._variants_for(filename)
+        choices = list(range(len(variants)))
+        last = self.last_pick.get(filename)
+        if last is not None and len(choices) > 1:
+            choices.remove(last)
+        index = random.choice(choices)
+        self.last_pick[filename] = index
+        variant = variants[index]
+        if variant.sample is None:
+            self._render(filename, variant)
+        variant.uses += 1
+        variant.last_used = time.time()
+        return variant.sample
+
+    def clear(self):
+        for vs in self.variants.values():
+            for v in vs:
+                if v.sample is not None:
+                    v.sample.free()
+            # end for
+        # end for
+        self.variants = {}
+        self.last_pick = {}
+        self.total_bytes = 0
+
+    def get_stats(self):
+        rendered = sum(1 for vs in self.variants.values() for v in vs if v.sample is not None)
+        return {
+            'files': len(self.variants),
+            'rendered': rendered,
+            'bytes': self.total_bytes,
+            'renders': self.renders,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,303 @@
+from __future__ import absolute_import
+import array
+import collections
+import math
+import queue
+import socket
+import struct
+import threading
+import time
+from .external.pybass import *
+from .main import bass_call_0
+from .recording import Recording
+from .ring_buffer import RingBuffer
+from .stream import PushStream
+
+# sequence number, capture timestamp (perf_counter seconds), payload length
+PACKET_HEADER = struct.Struct('<IdH')
+
+
+def pack_packet(seq, timestamp, payload):
+    return PACKET_HEADER.pack(seq, timestamp, len(payload)) + payload
+
+
+def unpack_packet(data):
+    seq, timestamp, length = PACKET_HEADER.unpack_from(data, 0)
+    return seq, timestamp, data[PACKET_HEADER.size:PACKET_HEADER.size + length]
+
+
+class LoopbackTransport(object):
+    """Delivers every sent packet back to the same process. Useful for testing the voice pipeline locally."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def send(self, packet):
+        self.queue.put(packet)
+
+    def receive(self):
+        """Returns a list of packets that arrived since the last call. Never blocks."""
+        res = []
+        try:
+            while True:
+                res.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return res
+
+    def close(self):
+        pass
+
+
+class UDPTransport(object):
+    """Sends packets to a peer over UDP. Binding both ends to localhost gives a stand-in for a real network transport."""
+
+    def __init__(self, local=('127.0.0.1', 0), remote=None):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(local)
+        self.socket.setblocking(False)
+        self.remote = remote
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def send(self, packet):
+        if self.remote is not None:
+            self.socket.sendto(packet, self.remote)
+
+    def receive(self):
+        """Returns a list of packets that arrived since the last call. Never blocks."""
+        res = []
+        while True:
+            try:
+                res.append(self.socket.recv(65536))
+            except (BlockingIOError, InterruptedError):
+                break
+        return res
+
+    def close(self):
+        self.socket.close()
+
+
+class JitterBuffer(object):
+    """Reorders incoming frames and delays playout by an amount that adapts to the measured network jitter.
+
+    Jitter is estimated as in RFC 3550 from the difference between arrival and capture intervals. The target depth is enough frames to cover twice the estimated jitter, clamped between min_depth and max_depth. Once playing, a backlog beyond the target is drained by skipping one extra frame per get() (counted in drained)."""
+
+    def __init__(self, frame_duration, min_depth=1, max_depth=10):
+        self.frame_duration = frame_duration
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.frames = {}
+        self.next_seq = None
+        self.jitter = 0.0
+        self.last_transit = None
+        self.target_depth = min_depth
+        self.started = False
+        self.late = 0
+        self.lost = 0
+        self.received = 0
+        self.drained = 0
+
+    def put(self, seq, timestamp, payload, arrival=None):
+        if arrival is None:
+            arrival = time.perf_counter()
+        transit = arrival - timestamp
+        if self.last_transit is not None:
+            self.jitter += (abs(transit - self.last_transit) - self.jitter) / 16
+        self.last_transit = transit
+        self.target_depth = max(self.min_depth, min(
+            self.max_depth, int(math.ceil(2 * self.jitter / self.frame_duration)) + 1))
+        if self.next_seq is not None and seq < self.next_seq:
+            self.late += 1
+            return
+        self.received += 1
+        self.frames[seq] = (timestamp, payload)
+
+    @property
+    def depth(self):
+        return len(self.frames)
+
+    def get(self):
+        """Returns (timestamp, payload) of the next frame, None if that frame is missing, or False while prebuffering."""
+        if not self.started:
+            if self.depth < self.target_depth:
+                return False
+            self.started = True
+            self.next_seq = min(self.frames)
+        if not self.frames:
+            self.started = False  # underrun: prebuffer again
+            return False
+        frame = self.frames.pop(self.next_seq, None)
+        self.next_seq += 1
+        if frame is None:
+            self.lost += 1
+        # Drain a backlog that built up after prebuffering, one frame at a time so that each skip is short.
+        if self.depth > self.target_depth + 1:
+            self._skip()
+        # Drop frames beyond the maximum depth so latency can't grow unbounded.
+        while self.depth > self.max_depth:
+            self._skip()
+        return frame
+
+    def _skip(self):
+        if self.frames.pop(self.next_seq, None) is not None:
+            self.drained += 1
+        self.next_seq += 1
+
+
+class VoicePipeline(object):
+    """Captures audio from the current recording device, cuts it into fixed-size frames, sends them through a transport and plays received frames through a PushStream.
+
+    A recording device must be initialized (sound_lib.input.Input) before starting. processor, if given, is called with each captured frame (bytes of 16-bit PCM) and must return a frame of the same size."""
+
+    def __init__(
+            self,
+            transport=None,
+            frequency=16000,
+            channels=1,
+            frame_duration=0.02,
+            processor=None,
+            min_depth=1,
+            max_depth=10):
+        if transport is None:
+            transport = LoopbackTransport()
+        self.transport = transport
+        self.frequency = frequency
+        self.channels = channels
+        self.frame_duration = frame_duration
+        self.frame_size = int(frequency * frame_duration) * channels * 2
+        self.processor = processor
+        self.capture_ring = RingBuffer(self.frame_size * 50)
+        self.capture_overruns = 0
+        self.jitter_buffer = JitterBuffer(frame_duration, min_depth, max_depth)
+        self.latencies = collections.deque(maxlen=250)
+        self.last_frame = None
+        self.concealed = 0
+        self.drained = 0
+        self.seq = 0
+        self.running = False
+        self.thread = None
+        self.stream = PushStream(freq=frequency, chans=channels)
+        self.recording = Recording(
+            frequency=frequency,
+            channels=channels,
+            proc=self._capture)
+
+    def _capture(self, handle, buffer, length, user):
+        if not self.capture_ring.write(buffer, length):
+            self.capture_overruns += 1
+        return True
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        self.recording.play()
+        self.stream.play()
+
+    def stop(self):
+        self.running = False
+        self.recording.stop()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.stream.stop()
+
+    def free(self):
+        self.transport.close()
+        self.stream.free()
+
+    def _send_captured(self):
+        byte_rate = float(self.frequency * self.channels * 2)
+        while self.capture_ring.used >= self.frame_size:
+            # Estimate when the oldest queued sample was captured.
+            timestamp = time.perf_counter() - self.capture_ring.used / byte_rate
+            frame = self.capture_ring.read(self.frame_size)
+            if self.processor is not None:
+                frame = self.processor(frame)
+            self.transport.send(pack_packet(self.seq, timestamp, frame))
+            self.seq = (self.seq + 1) & 0xffffffff
+
+    def _receive(self):
+        now = time.perf_counter()
+        for packet in self.transport.receive():
+            seq, timestamp, payload = unpack_packet(packet)
+            self.jitter_buffer.put(seq, timestamp, payload, now)
+
+    def _conceal(self):
+        """Packet-loss concealment: repeats the last good frame, halving its level on each consecutive loss."""
+        self.concealed += 1
+        if self.last_frame is None:
+            return b'\0' * self.frame_size
+        samples = array.array('h', self.last_frame)
+        samples = array.array('h', [s >> 1 for s in samples])
+        self.last_frame = samples.tobytes()
+        return self.last_frame
+
+    def get_queued(self):
+        """Returns the number of received bytes not yet heard: the PushStream queue plus its playback buffer."""
+        buffered = bass_call_0(
+            BASS_ChannelGetData,
+            self.stream.handle,
+            None,
+            BASS_DATA_AVAILABLE)
+        return self.stream.get_queued() + buffered
+
+    def _play_next(self):
+        frame = self.jitter_buffer.get()
+        if frame is False:
+            return
+        queued = self.get_queued()
+        if frame is None:
+            payload = self._conceal()
+        else:
+            timestamp, payload = frame
+            self.last_frame = payload
+        # If playback falls behind, e.g. because the device clock is slightly slow, skip a frame rather than let the stream queue grow.
+        if queued > (self.jitter_buffer.target_depth + 1) * self.frame_size:
+            self.drained += 1
+            return
+        if frame is not None:
+            queued_time = queued / float(self.frequency * self.channels * 2)
+            self.latencies.append(
+                time.perf_counter() - timestamp + queued_time)
+        self.stream.push(payload)
+
+    def _run(self):
+        deadline = time.perf_counter()
+        while self.running:
+            self._send_captured()
+            self._receive()
+            now = time.perf_counter()
+            if now >= deadline:
+                self._play_next()
+                deadline += self.frame_duration
+                if now - deadline > self.frame_duration * 5:
+                    deadline = now  # we fell far behind; don't try to catch up
+            time.sleep(self.frame_duration / 4)
+        # end while
+
+    @property
+    def latency(self):
+        """Average end-to-end latency in seconds over the recent frames (capture to playback, including the PushStream queue)."""
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
+
+    def get_stats(self):
+        jb = self.jitter_buffer
+        return {
+            'latency': self.latency,
+            'jitter': jb.jitter,
+            'target_depth': jb.target_depth,
+            'depth': jb.depth,
+            'received': jb.received,
+            'lost': jb.lost,
+            'late': jb.late,
+            'concealed': self.concealed,
+            'drained': jb.drained + self.drained,
+            'capture_overruns': self.capture_overruns,
+        }
@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+import json
+import os
+from .external.pybass import *
+from .main import bass_call
+
+CATEGORIES = ('master', 'music', 'sfx', 'ui', 'voice')
+
+
+class VolumeCategories(object):
+    """Named volume levels from 0 to 1, applied through BASS global volume options or bus channels.
+
+    Bind each category to a global volume option (BASS_CONFIG_GVOL_SAMPLE, _STREAM or _MUSIC) or to bus channels such as Mixers, whose volume attribute scales everything routed through them. Changing a level sets only its bindings, however many channels are playing. A category's effective level is multiplied by master, so changing master reapplies every category. Give each option or bus to one category only.
+
+    Levels can be saved to and loaded from a JSON file."""
+
+    def __init__(self, names=CATEGORIES, filename=None):
+        self.levels = dict((name, 1.0) for name in names)
+        self.configs = dict((name, []) for name in names)
+        self.buses = dict((name, []) for name in names)
+        self.filename = filename
+
+    def bind_config(self, name, option):
+        self.configs[name].append(option)
+        self.apply(name)
+
+    def bind_bus(self, name, channel):
+        self.buses[name].append(channel)
+        self.apply(name)
+
+    def unbind_bus(self, name, channel):
+        self.buses[name].remove(channel)
+
+    def get(self, name):
+        return self.levels[name]
+
+    def get_effective(self, name):
+        if name == 'master':
+            return self.levels[name]
+        return self.levels[name] * self.levels.get('master', 1.0)
+
+    def set(self, name, level):
+        self.levels[name] = max(0.0, min(1.0, float(level)))
+        if name == 'master':
+            self.apply()
+        else:
+            self.apply(name)
+
+    def apply(self, name=None):
+        """Applies one category, or all of them."""
+        names = self.levels if name is None else (name,)
+        for n in names:
+            level = self.get_effective(n)
+            for option in self.configs[n]:
+                bass_call(BASS_SetConfig, option, int(round(level * 10000)))
+            for channel in self.buses[n]:
+                channel.set_volume(level)
+        # end for
+
+    def to_dict(self):
+        return dict(self.levels)
+
+    def update(self, levels):
+        """Sets levels from a dict, ignoring unknown categories."""
+        for name, level in levels.items():
+            if name in self.levels:
+                self.levels[name] = max(0.0, min(1.0, float(level)))
+        # end for
+        self.apply()
+
+    def load(self, filename=None):
+        """Loads levels saved with save(). A missing or unreadable file leaves the levels unchanged, and values that aren't numbers are skipped. Returns True if levels were loaded."""
+        filename = filename or self.filename
+        if not filename or not os.path.exists(filename):
+            return False
+        try:
+            with open(filename, 'r') as f:
+                levels = json.load(f)
+        except (IOError, ValueError):
+            return False
+        if not isinstance(levels, dict):
+            return False
+        valid = {}
+        for name, level in levels.items():
+            try:
+                valid[name] = float(level)
+            except (TypeError, ValueError):
+                continue
+        # end for
+        self.update(valid)
+        return True
+
+    def save(self, filename=None):
+        filename = filename or self.filename
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4, sort_keys=True)
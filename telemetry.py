@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Per-frame timing telemetry
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# Export format (version 1). The file is appended to; one record per line, space separated key=value pairs. Every line starts with "v=1 ts=<unix time> kind=<kind>".
+# kind=summary frames=<total> missed=<total> budget_ms=<float>
+# kind=phase phase=<name> count=<n> mean_ms=<float> p50_ms=<float> p95_ms=<float> p99_ms=<float> max_ms=<float>
+# kind=hist phase=<name> le=<bucket upper bound in ms or inf> count=<cumulative count>
+# Percentiles are computed over the rolling window; counters and histograms are cumulative since telemetry was enabled.
+
+import bisect
+import collections
+import threading
+import time
+
+HISTOGRAM_BUCKETS = (1.0, 2.0, 4.0, 8.0, 12.0, 1000 / 60, 25.0, 33.3, 50.0, 100.0)
+FORMAT_VERSION = 1
+
+
+class PhaseStats:
+    """Rolling samples and a cumulative histogram of one phase."""
+
+    def __init__(self, windowSize):
+        self.samples = collections.deque(maxlen=windowSize)
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, ms)] += 1
+        self.count += 1
+
+    def percentile(self, p):
+        """
+        Returns the p-th percentile of the rolling window in milliseconds, or 0 if there's no sample.
+
+        :param p: Percentile (0-100).
+        :type p: float
+        :rtype: float
+        """
+        if not self.samples:
+            return 0.0
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(len(s) * p / 100))]
+
+    def histogram(self):
+        """
+        Returns a list of (upper bound, cumulative count) tuples. The last bound is float("inf").
+
+        :rtype: list
+        """
+        ret = []
+        total = 0
+        for bound, c in zip(HISTOGRAM_BUCKETS + (float("inf"),), self.buckets):
+            total += c
+            ret.append((bound, total))
+        return ret
+
+
+class FrameTelemetry:
+    """
+    Measures how long each phase of a frame takes. Time is attributed with mark: calling mark(name) records the time elapsed since the previous mark as the given phase.
+
+    SingletonWindow.frameUpdate records "update" (your own code between frames), "render", "input" and "events". You can split your own phases (e.g. "sound") by calling mark in your update code. When disabled, every method returns immediately.
+    """
+
+    def __init__(
+            self,
+            windowSize=600,
+            budgetMs=1000 / 60,
+            fileName="telemetry.log",
+            exportInterval=5.0):
+        """
+        :param windowSize: Number of frames used for rolling percentiles.
+        :type windowSize: int
+        :param budgetMs: Frame budget in milliseconds. Frames whose work exceeds this value are counted as missed.
+        :type budgetMs: float
+        :param fileName: File to which statistics are appended. None disables exporting.
+        :type fileName: str
+        :param exportInterval: Export interval in seconds.
+        :type exportInterval: float
+        """
+        self.windowSize = windowSize
+        self.budgetMs = budgetMs
+        self.fileName = fileName
+        self.exportInterval = exportInterval
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        """Clears all statistics."""
+        self.phases = collections.OrderedDict()
+        self.frame = PhaseStats(self.windowSize)
+        self.frames = 0
+        self.missed = 0
+        self.inFrame = False
+        self.frameWork = 0.0
+        self.lastMark = time.perf_counter()
+        self.lastExport = time.time()
+
+    def setEnabled(self, e):
+        """
+        Enables or disables telemetry. Can be called at any time while the game is running.
+
+        :param e: Enable?
+        :type e: bool
+        """
+        if e == self.enabled:
+            return
+        if e:
+            self.reset()
+        else:
+            self.export()
+        self.enabled = e
+
+    def toggle(self):
+        """Toggles telemetry and returns the new state."""
+        self.setEnabled(not self.enabled)
+        return self.enabled
+
+    def mark(self, name):
+        """
+        Records the time elapsed since the previous mark as the specified phase.
+
+        :param name: Phase name.
+        :type name: str
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        ms = (now - self.lastMark) * 1000
+        self.lastMark = now
+        if not self.inFrame:
+            return
+        p = self.phases.get(name)
+        if p is None:
+            p = PhaseStats(self.windowSize)
+            self.phases[name] = p
+        p.add(ms)
+        self.frameWork += ms
+
+    def skip(self):
+        """Discards the time elapsed since the previous mark (e.g. time spent sleeping to keep the frame rate)."""
+        if not self.enabled:
+            return
+        self.lastMark = time.perf_counter()
+
+    def beginFrame(self):
+        """Starts a frame. Time spent before this call since the previous mark is not counted."""
+        if not self.enabled:
+            return
+        self.skip()
+        self.inFrame = True
+        self.frameWork = 0.0
+
+    def endFrame(self):
+        """Finishes the current frame, updating the frame statistics and exporting them if the export interval has elapsed."""
+        if not self.enabled or not self.inFrame:
+            return
+        self.inFrame = False
+        self.frames += 1
+        self.frame.add(self.frameWork)
+        if self.frameWork > self.budgetMs:
+            self.missed += 1
+        if self.fileName and time.time() - self.lastExport >= self.exportInterval:
+            self.export()
+
+    def getLines(self):
+        """
+        Returns the current statistics in the export format.
+
+        :rtype: list
+        """
+        ts = "v=%d ts=%.3f" % (FORMAT_VERSION, time.time())
+        lines = ["%s kind=summary frames=%d missed=%d budget_ms=%.3f" %
+                 (ts, self.frames, self.missed, self.budgetMs)]
+        stats = [("frame", self.frame)] + list(self.phases.items())
+        for name, p in stats:
+            mean = sum(p.samples) / len(p.samples) if p.samples else 0.0
+            lines.append(
+                "%s kind=phase phase=%s count=%d mean_ms=%.3f p50_ms=%.3f p95_ms=%.3f p99_ms=%.3f max_ms=%.3f" %
+                (ts, name, p.count, mean, p.percentile(50), p.percentile(95), p.percentile(99), max(
+                    p.samples) if p.samples else 0.0))
+            for bound, c in p.histogram():
+                lines.append("%s kind=hist phase=%s le=%s count=%d" %
+                             (ts, name, "inf" if bound == float("inf") else "%.3f" % bound, c))
+            # end histogram
+        # end for
+        return lines
+
+    def export(self):
+        """Appends the current statistics to the export file. The file is written on a background thread so that a slow disk doesn't stall the frame."""
+        self.lastExport = time.time()
+        if not self.fileName or self.frames == 0:
+            return
+        lines = self.getLines()
+        threading.Thread(
+            target=self._write, args=(
+                self.fileName, lines), daemon=True).start()
+
+    def _write(self, fileName, lines):
+        with open(fileName, "a", encoding="UTF-8") as f:
+            f.write("\n".join(lines) + "\n")
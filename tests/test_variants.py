@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sound_lib.output import Output
+from sound_lib.variants import render_variant
+
+FX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fx")
+
+
+class RenderVariantTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.output = Output(device=0)  # the no-sound device; decoding needs no hardware
+
+    def render(self, pitch, tempo):
+        result = []
+        worker = threading.Thread(target=lambda: result.append(render_variant(
+            os.path.join(FX_DIR, "decide.ogg"), pitch=pitch, tempo=tempo)))
+        worker.daemon = True
+        worker.start()
+        worker.join(10)
+        self.assertFalse(worker.is_alive(), "render_variant did not return")
+        return result[0]
+
+    def test_original_stops_at_end(self):
+        data, freq, chans = self.render(0.0, 0.0)
+        self.assertGreater(len(data), 0)
+        self.assertEqual(len(data) % chans, 0)
+
+    def test_variant_stops_at_end(self):
+        original = self.render(0.0, 0.0)[0]
+        faster = self.render(2.0, 50.0)[0]
+        self.assertLess(len(faster), len(original))
+
+
+if __name__ == "__main__":
+    unittest.main()
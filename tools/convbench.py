@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Benchmark: partitioned convolution reverb cost
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# Usage: py tools\convbench.py [--rate N] [--chans N] [--block N] [--callback N] [--seconds N]
+# Runs sound_lib.convolution.Convolver over white noise with decaying-noise impulse responses of increasing length and prints the CPU time spent per second of audio. A value of 10 ms/s means the reverb uses 1% of one core. No audio device is needed.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sound_lib import convolution  # noqa: E402
+
+IR_LENGTHS = (0.25, 0.5, 1.0, 2.0, 4.0)
+
+
+def makeIr(seconds, rate, chans):
+    frames = int(seconds * rate)
+    rng = numpy.random.default_rng(0)
+    decay = numpy.exp(-6.9 * numpy.arange(frames) / frames)[:, None]
+    return (rng.standard_normal((frames, chans)) * decay).astype(numpy.float32)
+
+
+def measure(irSeconds, args):
+    ir = convolution.normalize_ir(makeIr(irSeconds, args.rate, args.chans))
+    start = time.perf_counter()
+    spectra = convolution.partition(ir, args.block)
+    prepare = time.perf_counter() - start
+    conv = convolution.Convolver(spectra, args.block, args.chans)
+    audio = numpy.random.default_rng(1).standard_normal(
+        (int(args.seconds * args.rate), args.chans))
+    out = numpy.empty_like(audio)
+    start = time.perf_counter()
+    for pos in range(0, len(audio), args.callback):
+        conv.process(audio[pos:pos + args.callback],
+                     out[pos:pos + args.callback])
+    # end for
+    elapsed = time.perf_counter() - start
+    print("%5.2f s IR %4d partitions  prepare %7.2f ms  %7.2f ms per second of audio" % (
+        irSeconds, len(spectra), prepare * 1000, elapsed / args.seconds * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--chans", type=int, default=2)
+    parser.add_argument("--block", type=int, default=1024,
+                        help="partition size in frames (latency)")
+    parser.add_argument("--callback", type=int, default=441,
+                        help="frames per DSP call, as BASS would deliver them")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    for seconds in IR_LENGTHS:
+        measure(seconds, args)
+    # end for
+
+
+if __name__ == "__main__":
+    main()
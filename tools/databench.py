@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Benchmark: PushStream.push / Channel.get_data throughput
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# Usage: py tools\databench.py [--block N] [--seconds N]
+# Pushes NumPy blocks into a decoding PushStream and reads them back, comparing the copying path (bytes() + get_data) with the in-place path (push(array) + get_data_into(array)). Uses the "no sound" device, so no audio is played.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from sound_lib import output, stream  # noqa: E402
+
+
+def run(name, s, block, seconds, step):
+    done = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        step(s, block)
+        done += block.nbytes * 2  # pushed and read back
+    # end while
+    elapsed = time.perf_counter() - start
+    print("%-10s %8.1f MB/s" % (name, done / elapsed / 1000000))
+
+
+def copyingStep(s, block):
+    s.push(bytes(block))
+    buf = s.get_data(block.nbytes)
+    numpy.frombuffer(buf.raw, dtype=block.dtype).copy()
+
+
+def inPlaceStep(s, block):
+    s.push(block)
+    s.get_data_into(block)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block", type=int, default=4096,
+                        help="frames per block")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    output.Output(device=0)
+    s = stream.PushStream(freq=44100, chans=2, decode=True)
+    block = numpy.zeros(args.block * 2, dtype=numpy.int16)
+    run("copying", s, block, args.seconds, copyingStep)
+    run("in place", s, block, args.seconds, inPlaceStep)
+    s.free()
+
+
+if __name__ == "__main__":
+    main()
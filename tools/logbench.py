@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Benchmark: frame time impact of logging under load
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# Usage: py tools\logbench.py [--frames N] [--records N] [--slow-disk-ms N]
+# Compares the old synchronous FileHandler against logSystem.LogPipeline by running a simulated 60fps game loop that logs a burst of records every frame.
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import logSystem  # noqa: E402
+
+
+class SlowFileHandler(logging.FileHandler):
+    """FileHandler that sleeps on every write to emulate a slow or busy disk."""
+
+    def __init__(self, filename, delay):
+        super().__init__(filename, mode="w", encoding="UTF-8")
+        self.slowDelay = delay
+
+    def emit(self, record):
+        time.sleep(self.slowDelay)
+        super().emit(record)
+
+
+def percentile(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(len(s) * p / 100))]
+
+
+def runLoop(logger, frames, records, onFrame=None):
+    times = []
+    for i in range(frames):
+        start = time.perf_counter()
+        if onFrame:
+            onFrame()
+        for j in range(records):
+            logger.info("frame %d record %d" % (i, j))
+        # end records
+        times.append((time.perf_counter() - start) * 1000)
+    # end frames
+    return times
+
+
+def report(name, times):
+    print("%-10s mean=%.3fms p50=%.3fms p99=%.3fms max=%.3fms over16.7ms=%d" % (
+        name,
+        sum(times) / len(times),
+        percentile(times, 50),
+        percentile(times, 99),
+        max(times),
+        len([t for t in times if t > 1000 / 60])))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    delay = args.slow_disk_ms / 1000
+
+    logger = logging.getLogger("bench.sync")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    if delay > 0:
+        h = SlowFileHandler(os.path.join(tmp, "sync.log"), delay)
+    else:
+        h = logging.FileHandler(
+            os.path.join(
+                tmp,
+                "sync.log"),
+            mode="w",
+            encoding="UTF-8")
+    logger.addHandler(h)
+    report("sync", runLoop(logger, args.frames, args.records))
+    h.close()
+
+    logger = logging.getLogger("bench.queue")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    pipeline = logSystem.LogPipeline(
+        filename=os.path.join(tmp, "queue.log"))
+    if delay > 0:
+        slow = SlowFileHandler(os.path.join(tmp, "queue.log"), delay)
+        pipeline.listener.handlers = (slow,)
+    pipeline.start(logger)
+    report("queue", runLoop(logger, args.frames,
+                            args.records, pipeline.newFrame))
+    pipeline.stop()
+
+    logger = logging.getLogger("bench.budget")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    pipeline = logSystem.LogPipeline(
+        filename=os.path.join(tmp, "budget.log"),
+        frameBudget=max(1, args.records // 4))
+    pipeline.start(logger)
+    report("budget", runLoop(logger, args.frames,
+                             args.records, pipeline.newFrame))
+    pipeline.stop()
+    print("dropped by budget: %d" % pipeline.budgetFilter.totalDropped)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Python audio game template
+# Benchmark: path resolution on the startup path
+# Copyright (C) 2020 Yukio Nozawa <personal@nyanchangames.com>
+#
+# Usage: py tools\pathbench.py [--number N] [--depth N]
+# Compares the former inspect.stack() based module_path/is_frozen with the memoized platform_utils.paths functions. --depth adds frames to the stack to emulate being called from deep inside an import chain.
+
+import argparse
+import inspect
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from platform_utils import paths  # noqa: E402
+
+
+def oldIsFrozen():
+    try:
+        import imp
+        return hasattr(sys, 'frozen') or imp.is_frozen("__main__")
+    except ImportError:  # imp was removed in Python 3.12
+        return hasattr(sys, 'frozen')
+
+
+def oldGetModule(level=2):
+    return inspect.getmodule(inspect.stack()[level][0]).__file__
+
+
+def oldModulePath(level=2):
+    return os.path.abspath(os.path.dirname(oldGetModule(level)))
+
+
+def oldStartup():
+    oldIsFrozen()
+    return oldModulePath()
+
+
+def newStartup():
+    paths.is_frozen()
+    return paths.module_path_of(__file__)
+
+
+def newStackStartup():
+    paths.is_frozen()
+    return paths.module_path()
+
+
+def nested(depth, func):
+    if depth == 0:
+        return func()
+    return nested(depth - 1, func)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=30)
+    args = parser.parse_args()
+    cases = (
+        ("inspect.stack", oldStartup),
+        ("frame lookup", newStackStartup),
+        ("explicit", newStartup),
+    )
+    for name, func in cases:
+        t = timeit.timeit(
+            lambda: nested(
+                args.depth,
+                func),
+            number=args.number)
+        print("%-14s %10.2f us/call" % (name, t / args.number * 1000000))
+    # end for
+
+
+if __name__ == "__main__":
+    main()
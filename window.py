@@ -12,7 +12,27 @@ import subprocess
 import wx
 import sys
 import accessible_output2.outputs.auto
+import constants
+import inputRecorder
 import keyCodes
+import sound
+import telemetry
+
+# Tick count sampled once per frame while recording or replaying, so that Timer sees the same clock in both.
+_frameTicks = None
+# pygame 2 returns a wrapper which accepts key codes as indices, so replayed key states are wrapped in the same way.
+_keyStateWrapper = getattr(pygame.key, "ScancodeWrapper", tuple)
+
+
+def getTicks():
+    """
+    Returns the number of milliseconds since the game started. While input is being recorded or replayed, the tick count sampled at the start of the current frame is returned instead, so that timer-driven code takes the same path in both.
+
+    :rtype: int
+    """
+    if _frameTicks is not None:
+        return _frameTicks
+    return pygame.time.get_ticks()
 
 
 class SingletonWindow():
@@ -22,6 +42,13 @@ class SingletonWindow():
         self.wxInstance = wx.App()
         pygame.init()
         self.clock = pygame.time.Clock()
+        self.telemetry = telemetry.FrameTelemetry(
+            fileName=constants.TELEMETRY_FILE_NAME,
+            exportInterval=constants.TELEMETRY_EXPORT_INTERVAL)
+        self.telemetry.setEnabled(constants.TELEMETRY_ENABLED)
+        self.recorder = None
+        self.replayer = None
+        self.replayRealtime = True
 
     def __del__(self):
         pygame.quit()
@@ -44,24 +71,106 @@ class SingletonWindow():
         A function that must be called once per frame. Calling this function will keep the 60fps speed.
 
         When user presses alt+f4 or the x icon, this function attempts to shut down the game by calling self.exit method. It is possible that the exit message is canceled by the onExit callback currently set.
+
+        Pressing alt+f12 toggles frame telemetry (see telemetry.py).
         """
-        self.clock.tick(60)
+        global _frameTicks
+        self.telemetry.mark("update")
+        self.telemetry.endFrame()
+        if self.replayer is None or self.replayRealtime:
+            self.clock.tick(60)
+        self.telemetry.beginFrame()
         self.screen.fill((255, 63, 10,))
         pygame.display.update()
+        self.telemetry.mark("render")
         self.previousKeys = copy(self.keys)
-        self.keys = pygame.key.get_pressed()
+        if self.replayer is None:
+            self.keys = pygame.key.get_pressed()
+            if self.recorder is not None:
+                _frameTicks = pygame.time.get_ticks()
+        else:
+            self.replayFrame()
+        self.telemetry.mark("input")
+        quit = False
+        for event in pygame.event.get():
+            if event.type == keyCodes.QUIT:
+                quit = True
+        # end event
+        if self.replayer is not None and self.replayer.quit:
+            quit = True
+        self.telemetry.mark("events")
+        if self.recorder is not None:
+            self.recorder.record(getTicks(), self.keys, quit)
         if self.keyPressed(keyCodes.K_LCTRL):
             self.sayStop()
         if self.keyPressing(
                 keyCodes.K_LALT) and self.keyPressed(
                 keyCodes.K_F4):
             self.exit()
-        for event in pygame.event.get():
-            if event.type == keyCodes.QUIT:
-                self.exit()
-        # end event
+        if self.keyPressing(
+                keyCodes.K_LALT) and self.keyPressed(
+                keyCodes.K_F12):
+            self.say("Telemetry on" if self.telemetry.toggle()
+                     else "Telemetry off", interrupt=True)
+        if quit:
+            self.exit()
     # end frameUpdate
 
+    def startRecording(self, fileName):
+        """
+        Starts recording the input of every frame. The record is written when stopRecording is called or the game exits. While recording, Timer sees the tick count sampled at the start of each frame, which is what gets recorded and replayed.
+
+        :param fileName: File to write.
+        :type fileName: str
+        """
+        self.stopRecording()
+        self.recorder = inputRecorder.InputRecorder(fileName)
+
+    def stopRecording(self):
+        """Stops recording and writes the record file. Does nothing when not recording."""
+        global _frameTicks
+        if self.recorder is None:
+            return
+        self.recorder.close()
+        self.recorder = None
+        if self.replayer is None:
+            _frameTicks = None
+
+    def startReplay(self, fileName, realtime=True):
+        """
+        Replays a record made by startRecording. While replaying, keyPressed, keyPressing and Timer see the recorded state instead of the live keyboard and clock.
+
+        :param fileName: File to replay.
+        :type fileName: str
+        :param realtime: If False, frames are not limited to 60fps so that a recorded session can be run as fast as possible for benchmarking.
+        :type realtime: bool
+        """
+        self.replayer = inputRecorder.InputReplayer(fileName)
+        self.replayRealtime = realtime
+
+    def stopReplay(self):
+        """Stops replaying and returns to the live keyboard and clock."""
+        global _frameTicks
+        self.replayer = None
+        _frameTicks = None
+
+    def replayFrame(self):
+        """Internal function which loads the next recorded frame. Called from frameUpdate while replaying."""
+        global _frameTicks
+        if not self.replayer.next():
+            self.stopReplay()
+            self.keys = pygame.key.get_pressed()
+            self.onReplayFinished()
+            return
+        # end finished
+        self.keys = _keyStateWrapper(self.replayer.keys)
+        _frameTicks = self.replayer.ticks
+
+    def onReplayFinished(self):
+        """Override this method to define what happens when a replay reaches the end of the record. By default, exports telemetry and exits the game."""
+        self.telemetry.export()
+        self.exit()
+
     def keyPressed(self, key):
         """
         Retrieves if the specified key has changed to "pressed" from "not pressed" at the last frame. Doesn't cause key repeats.
@@ -87,17 +196,20 @@ class SingletonWindow():
     # end wait
 
     def say(self, str, interrupt=False):
-        """tts speech"""
+        """tts speech. Music is ducked for the estimated duration of the speech (see sound.duckFor)."""
         self.speech.speak(str, interrupt=interrupt)
+        sound.duckFor(len(str) / constants.SPEECH_CHARACTERS_PER_SECOND)
 
     def sayStop(self):
         """stops tts speech"""
         self.speech.silence()
+        sound.unduck()
 
     def exit(self):
         """Attempt to exit the game. It is canceled if the onExit callback is set and it returned False."""
         if not self.onExit():
             return
+        self.stopRecording()
         sys.exit()
 
     def onExit(self):
@@ -158,7 +270,7 @@ class Timer:
     def restart(self):
         """Restarts this timer."""
         self.pausedElapsed = 0
-        self.startTick = pygame.time.get_ticks()
+        self.startTick = getTicks()
 
     @property
     def elapsed(self):
@@ -169,7 +281,7 @@ class Timer:
         """
         if self.paused:
             return self.pausedElapsed
-        return self.pausedElapsed + pygame.time.get_ticks() - self.startTick
+        return self.pausedElapsed + getTicks() - self.startTick
 
     def setPaused(self, p):
         if p == self.paused:
@@ -177,7 +289,7 @@ class Timer:
         if p:
             self.pausedElapsed = self.elapsed
         else:
-            self.startTick = pygame.time.get_ticks()
+            self.startTick = getTicks()
         # end paused or unpaused
         self.paused = p
     # end setPaused
@@ -466,12 +578,12 @@ class Menu:
     def cancel(self):
         """Internal function which is triggered when canceling the menu. """
         if self.cancelSound is not None:
-            playOneShot(self.cancelSound)
+            sound.playOneShot(self.cancelSound, duck=True)
 
     def enter(self):
         """Internal function which is triggered when selecting an option. """
         if self.enterSound is not None:
-            playOneShot(self.enterSound)
+            sound.playOneShot(self.enterSound, duck=True)
 
     def getCursorPos(self):
         """Returns the current cursor position. """
@@ -495,9 +607,9 @@ class Menu:
             return
         self.holdTimer.restart()
         if self.cursorSound is not None:
-            playOneShot(self.cursorSound)
+            sound.playOneShot(self.cursorSound, duck=True)
         if not self.is_available[c] and self.unavailableSound is not None:
-            playOneShot(self.unavailableSound)
+            sound.playOneShot(self.unavailableSound, duck=True)
         self.cursor = c
         self.wnd.say(self.getReadStr())
     # end moveTo